@@ -11,7 +11,23 @@ Spec version: 2026-02-10
 from __future__ import annotations
 
 import hassapi as hass
+import bisect
+import cProfile
 import datetime
+import io
+import json
+import math
+import os
+import pstats
+import queue
+import random
+import tempfile
+import threading
+import time
+import traceback
+import tracemalloc
+from collections import Counter, deque
+from dataclasses import dataclass, field
 
 # ---------------------------------------------------------------------------
 # Constants
@@ -38,6 +54,493 @@ STATE_HEAT_FF = "HEAT_FF"
 STATE_DHW_QUOTA = "DHW_QUOTA"
 
 GUARD_RELEASE_DELAY = 2  # seconds
+USER_SP_SETTLE_S = 3  # quiet seconds before a user's setpoint burst is committed
+
+TICK_INTERVAL = 60  # seconds, default main tick period
+MIN_TICK_INTERVAL = 10  # seconds
+DEFAULT_RESET_TIME = "00:00:00"
+RELOAD_BUTTON = "input_button.heat_orchestrator_reload"
+
+# Actuation retry queue / per-room circuit breaker
+ACTUATION_RETRY_BASE = 5.0  # seconds before the first retry
+ACTUATION_RETRY_JITTER = 0.2  # ± fraction applied to every retry delay
+BREAKER_FAILURE_THRESHOLD = 3  # consecutive failures before a room is unmanaged
+UNMANAGED_TIMEOUT_MIN = 15  # minutes a tripped room stays unmanaged
+ACTUATION_CONFIRM_TIMEOUT = 120.0  # default seconds to wait before re-sending an unreported setpoint
+# Unreported sends wait twice as long each time; the BREAKER_FAILURE_THRESHOLD-th
+# consecutive one opens the breaker
+
+DIAGNOSTICS_SENSOR = "sensor.heat_orchestrator"
+PUBLISH_REFRESH_TICKS = 60  # republish unchanged sensors hourly (survives HA restarts)
+
+# Watchdog: HA API latency and stale sensor data
+WATCHDOG_SENSOR = "sensor.heat_orchestrator_watchdog"
+LATENCY_WINDOW = 256  # most recent samples kept per operation
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+WATCHDOG_RECOVERY_TICKS = 5  # healthy ticks required before leaving degraded mode
+WATCHDOG_MIN_SAMPLES = 20  # an operation's p95 is judged only once it has this many samples
+# Slow by nature (radio round trip, cloud forecast) – own, looser threshold
+DEVICE_LATENCY_OPS = ("call_service:climate", "call_service:weather")
+
+# Single-writer event loop: every callback runs on one dedicated thread
+WRITER_THREAD_NAME = "heat_orchestrator-writer"
+WRITER_STOP_TIMEOUT = 10  # seconds terminate() waits for queued events
+
+# Profiling (opt-in, toggled live)
+PROFILING_TOGGLE = "input_boolean.heat_orchestrator_profiling"
+PROFILE_EVERY_N = 10  # profile every Nth call of each hooked callback
+PROFILE_WINDOW = 30  # profiled calls aggregated into one report
+PROFILE_DIR = os.path.join(tempfile.gettempdir(), "heat_orchestrator_profiles")
+PROFILE_TOP_N = 40  # functions / allocation sites listed per report
+
+# Forecast-driven pre-heating before the nightly OFF window
+FORECAST_REFRESH_MIN = 60  # minutes an hourly forecast stays cached
+COOLING_SAMPLE_MIN = 30  # minutes between cooling-rate samples per room
+COOLING_EWMA_ALPHA = 0.3  # weight of the newest cooling-rate sample
+
+# Energy / heating-time attribution per room
+ENERGY_STORE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "energy_ledger.json")
+ENERGY_SAVE_TICKS = 10  # ticks between writes of the local store
+ENERGY_MAX_GAP_TICKS = 2  # power samples further apart (in tick intervals) are not integrated
+ENERGY_DEFICIT_FLOOR = 0.1  # °C – weight of a heating room already at target
+ENERGY_WEIGHTINGS = ("deficit", "valves")
+ENERGY_UNITS = {  # unit_of_measurement → (kind, factor to kW / kWh)
+    "W": ("power", 0.001),
+    "kW": ("power", 1.0),
+    "Wh": ("energy", 0.001),
+    "kWh": ("energy", 1.0),
+    "MWh": ("energy", 1000.0),
+}
+
+# Pump cycle analytics
+CYCLE_HISTORY = 1024  # pump starts/runs kept (covers 7 days at ~6 starts/h)
+CYCLE_MEAN_OVER = 20  # completed runs/rests averaged for mean lengths
+SHORT_CYCLE_STARTS_1H = 3  # starts within one hour that count as short-cycling
+
+
+@dataclass
+class PendingActuation:
+    """A climate/set_temperature command waiting for an off-tick retry."""
+
+    temperature: float
+
+
+@dataclass
+class SetpointTarget:
+    """Setpoint the orchestrator wants on one thermostat, and whether the
+    thermostat has reported it back yet."""
+
+    temperature: float
+    heating: bool
+    sent_at: float | None = None  # time.monotonic() of the last send
+    confirmed: bool = False
+
+
+@dataclass(frozen=True)
+class OrchestratorConfig:
+    """Structural configuration – everything a hot reload may change.
+
+    Built from app args, an optional ``config_file`` (YAML/JSON, same keys,
+    takes precedence) and ``input_datetime.day_reset_time``.
+    """
+
+    gf_rooms: tuple[str, ...] = tuple(GF_ROOMS)
+    ff_rooms: tuple[str, ...] = tuple(FF_ROOMS)
+    heating_entity_overrides: dict[str, str] = field(default_factory=dict)
+    tick_interval: int = TICK_INTERVAL
+    day_reset_time: str = DEFAULT_RESET_TIME
+    energy_sensor: str | None = None  # pump power (W/kW) or energy meter (Wh/kWh)
+    pump_power_kw: float = 0.0  # nominal draw while running, if no sensor
+    energy_weighting: str = "deficit"
+    room_valves: dict[str, int] = field(default_factory=dict)  # floor-loop valves per room, default 1
+
+    @property
+    def all_rooms(self) -> tuple[str, ...]:
+        return self.gf_rooms + self.ff_rooms
+
+
+class LatencyHistogram:
+    """Rolling latency histogram over the most recent LATENCY_WINDOW samples.
+
+    Samples are kept with their bucket index; bucket counts are adjusted on
+    insert and on eviction, so recording is O(1) and memory is fixed. A
+    percentile locates its bucket from the counts and then ranks only the
+    samples inside that bucket, so it reports a measured value.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples: deque[tuple[int, float]] = deque(maxlen=window)
+        self._counts = [0] * len(LATENCY_BUCKETS_MS)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, ms: float):
+        if len(self._samples) == self._samples.maxlen:
+            self._counts[self._samples[0][0]] -= 1
+        bucket = min(bisect.bisect_left(LATENCY_BUCKETS_MS, ms), len(LATENCY_BUCKETS_MS) - 1)
+        self._samples.append((bucket, ms))
+        self._counts[bucket] += 1
+
+    def percentile(self, q: float, exact: bool = True) -> float | None:
+        """Nearest-rank q-quantile of the recorded samples (ms).
+
+        ``exact=False`` returns the upper bound of its bucket instead – stable
+        enough for change-only sensor publication.
+        """
+        if not self._samples:
+            return None
+        rank = max(1, math.ceil(q * len(self._samples)))
+        seen = 0
+        for bucket, count in enumerate(self._counts):
+            if seen + count >= rank:
+                if not exact:
+                    return LATENCY_BUCKETS_MS[bucket]
+                inside = sorted(ms for b, ms in self._samples if b == bucket)
+                return round(inside[rank - seen - 1], 1)
+            seen += count
+        return None
+
+
+class _RingWindow:
+    """Time-windowed sum over a fixed-size ring of (timestamp, value) events.
+
+    Events must arrive in time order. Expiry advances a tail index past
+    events older than the window, so each event is added and removed once:
+    O(1) amortised per event, constant memory.
+    """
+
+    def __init__(self, window_s: float, ring: list, counter: list):
+        self.window_s = window_s
+        self._ring = ring  # shared [(ts, value)] storage
+        self._counter = counter  # shared [events ever written]
+        self._tail = 0
+        self.total = 0.0
+
+    def add(self, value: float):
+        self.total += value
+
+    def expire(self, now: float):
+        head = self._counter[0]
+        cap = len(self._ring)
+        while self._tail < head:
+            if head - self._tail > cap:
+                # Overwritten before it expired – it can no longer be subtracted
+                # exactly, so drop it and recompute below
+                self._tail = head - cap
+                self.total = sum(self._ring[i % cap][1] for i in range(self._tail, head))
+                continue
+            ts, value = self._ring[self._tail % cap]
+            if ts > now - self.window_s:
+                break
+            self.total -= value
+            self._tail += 1
+
+
+class _RingEvents:
+    """Fixed-size event ring feeding several rolling windows."""
+
+    def __init__(self, windows_s: tuple[float, ...], capacity: int = CYCLE_HISTORY):
+        self._ring: list = [(0.0, 0.0)] * capacity
+        self._counter = [0]
+        self.windows = {w: _RingWindow(w, self._ring, self._counter) for w in windows_s}
+
+    def add(self, ts: float, value: float = 1.0):
+        self._ring[self._counter[0] % len(self._ring)] = (ts, value)
+        self._counter[0] += 1
+        for window in self.windows.values():
+            window.add(value)
+
+    def total(self, window_s: float, now: float) -> float:
+        window = self.windows[window_s]
+        window.expire(now)
+        return window.total
+
+
+class _RollingMean:
+    """Mean of the last n values with a running sum."""
+
+    def __init__(self, n: int = CYCLE_MEAN_OVER):
+        self._values: deque[float] = deque(maxlen=n)
+        self._sum = 0.0
+
+    def add(self, value: float):
+        if len(self._values) == self._values.maxlen:
+            self._sum -= self._values[0]
+        self._values.append(value)
+        self._sum += value
+
+    @property
+    def last(self) -> float | None:
+        return self._values[-1] if self._values else None
+
+    @property
+    def mean(self) -> float | None:
+        return self._sum / len(self._values) if self._values else None
+
+
+class SingleWriter:
+    """Runs posted callables one at a time, in posting order, on one thread.
+
+    AppDaemon callbacks only post here; the posted handlers are the sole
+    writers of controller state, so no locks are needed however many worker
+    threads AppDaemon dispatches on. ``wait`` tracks how long events sit in
+    the queue before they run.
+    """
+
+    _STOP = object()
+
+    def __init__(self, on_error):
+        self.wait = LatencyHistogram()
+        self._on_error = on_error
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._drain, name=WRITER_THREAD_NAME, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def post(self, fn, *args, **kwargs):
+        self._queue.put((time.perf_counter(), fn, args, kwargs))
+
+    def stop(self, timeout: float) -> bool:
+        """Run everything already queued, then stop. False if that timed out."""
+        if not self._thread.is_alive():
+            return True  # never started (initialize failed), nothing runs
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _drain(self):
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                return
+            posted, fn, args, kwargs = item
+            self.wait.record((time.perf_counter() - posted) * 1000.0)
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                self._on_error(fn, e)
+
+
+class TickProfiler:
+    """Samples every Nth call of a hooked callback with cProfile (and,
+    optionally, tracemalloc), aggregates a window of samples per callback
+    and writes a ranked text report to ``directory``.
+
+    Used from the writer thread only, so samples never overlap.
+    """
+
+    def __init__(self, directory: str, every_n: int, window: int, trace_alloc: bool):
+        self.directory = directory
+        self.every_n = max(1, every_n)
+        self.window = max(1, window)
+        self.trace_alloc = trace_alloc
+        self._calls: Counter = Counter()
+        self._stats: dict[str, pstats.Stats] = {}
+        self._durations: dict[str, list[float]] = {}
+        self._alloc: dict[str, Counter] = {}
+        self._started_tracemalloc = False
+        if trace_alloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        os.makedirs(directory, exist_ok=True)
+
+    def run(self, fn, *args, **kwargs):
+        name = fn.__name__
+        self._calls[name] += 1
+        if self._calls[name] % self.every_n:
+            return fn(*args, **kwargs)
+        profile = cProfile.Profile()
+        before = tracemalloc.take_snapshot() if self.trace_alloc else None
+        start = time.perf_counter()
+        try:
+            return profile.runcall(fn, *args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            self._add(name, profile, before, elapsed_ms)
+
+    def _add(self, name: str, profile: cProfile.Profile, before, elapsed_ms: float):
+        if name in self._stats:
+            self._stats[name].add(profile)
+        else:
+            self._stats[name] = pstats.Stats(profile)
+        self._durations.setdefault(name, []).append(elapsed_ms)
+        if before is not None:
+            # Exclude the profiler's own bookkeeping from the allocation report
+            ignore = [
+                tracemalloc.Filter(False, module.__file__) for module in (cProfile, pstats, tracemalloc)
+            ]
+            after = tracemalloc.take_snapshot().filter_traces(ignore)
+            diff = after.compare_to(before.filter_traces(ignore), "lineno")
+            sites = self._alloc.setdefault(name, Counter())
+            for stat in diff[:PROFILE_TOP_N]:
+                sites[str(stat.traceback[0])] += stat.size_diff
+        if len(self._durations[name]) >= self.window:
+            self.dump(name)
+
+    def dump(self, name: str) -> str | None:
+        """Write the aggregated report for one callback and reset its window."""
+        stats = self._stats.pop(name, None)
+        durations = self._durations.pop(name, [])
+        sites = self._alloc.pop(name, Counter())
+        if stats is None:
+            return None
+
+        out = io.StringIO()
+        out.write(
+            f"{name}: {len(durations)} sampled calls (1 in {self.every_n}), "
+            f"mean {sum(durations) / len(durations):.1f} ms, max {max(durations):.1f} ms\n\n"
+        )
+        stats.stream = out
+        out.write("=== by cumulative time ===\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_TOP_N)
+        out.write("=== by own time ===\n")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(PROFILE_TOP_N)
+        if sites:
+            out.write("=== net allocations by line (bytes) ===\n")
+            for site, size in sites.most_common(PROFILE_TOP_N):
+                out.write(f"{size:>12}  {site}\n")
+
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        path = os.path.join(self.directory, f"{name.strip('_')}-{stamp}.txt")
+        with open(path, "w") as f:
+            f.write(out.getvalue())
+        return path
+
+    def close(self) -> list[str]:
+        """Flush partial windows and stop tracemalloc if we started it."""
+        paths = [p for p in (self.dump(name) for name in list(self._stats)) if p]
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        return paths
+
+
+class EnergyLedger:
+    """Per-room energy (kWh) and heating time (min) for the current day and
+    month, kept in one small JSON file.
+
+    ``add`` folds one tick interval in O(heating rooms); the day and month
+    roll over lazily on the first interval carrying a new date.
+    """
+
+    DHW = "_dhw"  # pump running for the DHW quota
+    OTHER = "_other"  # pump drawing power with no room heating
+
+    def __init__(self, path: str):
+        self.path = path
+        self.day = ""
+        self.month = ""
+        self.kwh_today: dict[str, float] = {}
+        self.kwh_month: dict[str, float] = {}
+        self.min_today: dict[str, float] = {}
+        self.min_month: dict[str, float] = {}
+        self.dirty = False
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.day = data.get("day", "")
+        self.month = data.get("month", "")
+        self.kwh_today = data.get("kwh_today", {})
+        self.kwh_month = data.get("kwh_month", {})
+        self.min_today = data.get("min_today", {})
+        self.min_month = data.get("min_month", {})
+
+    def add(self, day: datetime.date, kwh: float, weights: dict[str, float],
+            heating_rooms: list[str], minutes: float):
+        """Split ``kwh`` by ``weights`` (bucket → weight); credit ``minutes``
+        of heating time to each of ``heating_rooms``."""
+        self._roll(day)
+        total = sum(weights.values())
+        if kwh > 0 and total > 0:
+            for bucket, weight in weights.items():
+                share = kwh * weight / total
+                self.kwh_today[bucket] = self.kwh_today.get(bucket, 0.0) + share
+                self.kwh_month[bucket] = self.kwh_month.get(bucket, 0.0) + share
+            self.dirty = True
+        for room in heating_rooms:
+            self.min_today[room] = self.min_today.get(room, 0.0) + minutes
+            self.min_month[room] = self.min_month.get(room, 0.0) + minutes
+            self.dirty = True
+
+    def _roll(self, day: datetime.date):
+        today = day.isoformat()
+        if today == self.day:
+            return
+        self.dirty = True
+        self.day = today
+        self.kwh_today, self.min_today = {}, {}
+        if today[:7] != self.month:
+            self.month = today[:7]
+            self.kwh_month, self.min_month = {}, {}
+
+    def save(self):
+        """Atomically rewrite the store if anything changed."""
+        if not self.dirty:
+            return
+        data = {
+            "day": self.day,
+            "month": self.month,
+            "kwh_today": self.kwh_today,
+            "kwh_month": self.kwh_month,
+            "min_today": self.min_today,
+            "min_month": self.min_month,
+        }
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+class PumpCycleStats:
+    """Pump on/off cycle analytics in constant memory and O(1) per event.
+
+    Timestamps are epoch seconds. Duty cycle credits a finished run to the
+    window by its end time, plus the elapsed part of a run in progress.
+    """
+
+    HOUR = 3600.0
+    DAY = 24 * HOUR
+    WEEK = 7 * DAY
+
+    def __init__(self):
+        self.starts = _RingEvents((self.HOUR, self.DAY, self.WEEK))
+        self.runs = _RingEvents((self.DAY,))
+        self.run_lengths = _RollingMean()
+        self.rest_lengths = _RollingMean()
+        self.run_started: float | None = None
+        self.rest_started: float | None = None
+
+    def pump_started(self, ts: float):
+        if self.run_started is not None:
+            return  # already running
+        self.starts.add(ts)
+        if self.rest_started is not None:
+            self.rest_lengths.add(ts - self.rest_started)
+        self.rest_started = None
+        self.run_started = ts
+
+    def pump_stopped(self, ts: float):
+        if self.run_started is None:
+            self.rest_started = ts
+            return
+        duration = ts - self.run_started
+        self.runs.add(ts, duration)
+        self.run_lengths.add(duration)
+        self.run_started = None
+        self.rest_started = ts
+
+    def starts_within(self, window_s: float, now: float) -> int:
+        return int(self.starts.total(window_s, now))
+
+    def duty_cycle_24h(self, now: float) -> float:
+        on_s = self.runs.total(self.DAY, now)
+        if self.run_started is not None:
+            on_s += now - self.run_started
+        return min(1.0, on_s / self.DAY)
 
 
 class HeatOrchestrator(hass.Hass):
@@ -47,15 +550,65 @@ class HeatOrchestrator(hass.Hass):
     # Lifecycle
     # -----------------------------------------------------------------------
     def initialize(self):
+        # Watchdog state first – every HA read/service call below is timed
+        self._latency: dict[str, LatencyHistogram] = {}
+        self.stale_rooms: dict[str, str] = {}  # room → last report time of its thermostat
+        self.degraded: bool = False
+        self._degraded_reason: str = ""
+        self._healthy_ticks: int = 0
+
+        # Pump cycle analytics (in-memory, rebuilt from pump events)
+        self.pump_cycles = PumpCycleStats()
+
+        # Opt-in sampling profiler for _tick / _on_thermostat_change
+        self.profiler: TickProfiler | None = None
+
+        # Energy attribution: local day/month store and the previous meter
+        # sample (time, kind, kW or kWh) the next interval integrates from
+        self.energy = EnergyLedger((self.args or {}).get("energy_store", ENERGY_STORE))
+        self._energy_sample: tuple[datetime.datetime, str, float] | None = None
+
+        # Pre-heating: cached hourly forecast, per-room cooling constants
+        # (1/h, Newton's law) and the boost planned for the current tick
+        self._forecast: list[tuple[datetime.datetime, float]] = []
+        self._forecast_fetched: datetime.datetime | None = None
+        self._cooling_anchor: dict[str, tuple[datetime.datetime, float]] = {}
+        self.cooling_k: dict[str, float] = {}
+        self.preheat_boost: dict[str, float] = {}
+
         self.log("=== HeatOrchestrator initializing ===")
 
         # Automation guard – prevents recording automation-driven setpoint
         # changes as user changes.
-        self.automation_guard: dict[str, bool] = {r: False for r in ALL_ROOMS}
+        self.automation_guard: dict[str, bool] = {}
 
         # Set of rooms temporarily marked as "unmanaged" after errors
+        # (circuit breaker open)
         self.unmanaged_rooms: dict[str, datetime.datetime] = {}
 
+        # Failed setpoint writes queued for retry, and consecutive failure
+        # counts feeding the per-room circuit breaker
+        self.pending_actuations: dict[str, PendingActuation] = {}
+        self.actuation_failures: dict[str, int] = {}
+
+        # Reconciler: desired setpoint per thermostat vs. the last one it
+        # reported in a state event, and send → report latency per device
+        self.setpoint_targets: dict[str, SetpointTarget] = {}
+        self.reported_sp: dict[str, float | None] = {}
+        self.actuation_latency: dict[str, LatencyHistogram] = {}
+        self.unconfirmed_sends: dict[str, int] = {}  # consecutive sends never reported back
+        self._confirm_timeout = float(
+            (self.args or {}).get("actuation_confirm_timeout_s", ACTUATION_CONFIRM_TIMEOUT)
+        )
+
+        # User setpoint bursts (slider drags, dial turns) coalesced per room:
+        # room → (latest value, monotonic time of last event, event count)
+        self._pending_user_sp: dict[str, tuple[float, float, int]] = {}
+        self._user_sp_timers: dict[str, object] = {}
+        args = self.args or {}
+        self._user_sp_settle = int(args.get("user_sp_settle_s", USER_SP_SETTLE_S))
+        self._user_sp_reevaluate = bool(args.get("user_sp_reevaluate", True))
+
         # Last known outdoor temperature (fallback)
         self._last_outdoor_temp: float | None = None
 
@@ -65,42 +618,247 @@ class HeatOrchestrator(hass.Hass):
         self._tick_counter: int = 0
 
         # Track per-room cooldown expiry time
-        self.room_cooldown_until: dict[str, datetime.datetime | None] = {r: None for r in ALL_ROOMS}
+        self.room_cooldown_until: dict[str, datetime.datetime | None] = {}
 
-        # --- Bootstrap user setpoints if empty ---
-        self._bootstrap_user_setpoints()
+        # Decision made by the current tick and the per-room values it was
+        # based on; diagnostics are derived from these, never re-read
+        self._decision: dict = {"state": STATE_OFF, "floor": "none", "rooms": [], "t_out": None}
+        self._tick_rooms: dict[str, dict] = {}
 
-        # --- Listeners: thermostat setpoint changes (user tracking) ---
-        for room in ALL_ROOMS:
-            entity = f"{CLIMATE_PREFIX}{room}"
-            self.listen_state(
-                self._on_thermostat_change,
-                entity,
-                attribute="temperature",
-                room=room,
-            )
+        # Last content written per published sensor (change-only publication)
+        self._published: dict[str, tuple] = {}
+
+        # Structural config and the listeners/timers that depend on it;
+        # _apply_config diffs against this on hot reload
+        self.config: OrchestratorConfig | None = None
+        self._config_file_mtime: float | None = None
+        self._room_listeners: dict[str, object] = {}
+        self._tick_handle = None
+        self._reset_handle = None
+
+        # All callbacks below post to this writer; it starts once
+        # initialize() is done, so nothing races the setup above
+        self._writer = SingleWriter(self._on_writer_error)
+        self._latency["queue_wait"] = self._writer.wait
+
+        self._seed_pump_cycles()
+
+        # --- Rooms (bootstrap + thermostat listeners), main tick, daily reset ---
+        self._apply_config(self._load_config())
 
         # --- Listener: weather changes ---
         self.listen_state(self._on_weather_change, WEATHER_ENTITY)
 
-        # --- Main tick every 60 seconds ---
-        self.run_every(self._tick, "now", 60)
+        # --- Hot reload triggers ---
+        self.listen_state(self._on_reload_trigger, "input_datetime.day_reset_time")
+        self.listen_state(self._on_reload_trigger, RELOAD_BUTTON)
 
-        # --- Daily reset ---
-        reset_time = self.get_state("input_datetime.day_reset_time")
-        if reset_time:
-            self.run_daily(self._daily_reset, reset_time)
-        else:
-            self.run_daily(self._daily_reset, "00:00:00")
+        # --- Profiling toggle (input_boolean, or the "profile" arg) ---
+        self.listen_state(self._on_profiling_toggle, PROFILING_TOGGLE)
+        if self.get_state(PROFILING_TOGGLE) == "on" or self.args.get("profile", False):
+            self._set_profiling(True)
 
+        self._writer.start()
         self.log("=== HeatOrchestrator ready ===")
 
+    # -----------------------------------------------------------------------
+    # Configuration / hot reload
+    # -----------------------------------------------------------------------
+    def _floor_rooms(self, floor: str) -> tuple[str, ...]:
+        return self.config.gf_rooms if floor == "GF" else self.config.ff_rooms
+
+    def _load_config(self) -> OrchestratorConfig:
+        """Build the structural config from app args, config file and helpers."""
+        source = dict(self.args or {})
+        path = source.get("config_file")
+        if path:
+            source.update(self._read_config_file(path))
+
+        gf_rooms = tuple(source.get("gf_rooms", GF_ROOMS))
+        ff_rooms = tuple(source.get("ff_rooms", FF_ROOMS))
+        overlap = set(gf_rooms) & set(ff_rooms)
+        if overlap:
+            raise ValueError(f"rooms on both floors: {sorted(overlap)}")
+
+        overrides = dict(self._HEATING_ENTITY_OVERRIDES)
+        overrides.update(source.get("heating_entity_overrides", {}))
+
+        tick_interval = int(source.get("tick_interval", TICK_INTERVAL))
+        if tick_interval < MIN_TICK_INTERVAL:
+            raise ValueError(f"tick_interval must be at least {MIN_TICK_INTERVAL}s")
+
+        reset_time = self.get_state("input_datetime.day_reset_time")
+        if reset_time in (None, "unknown", "unavailable", ""):
+            reset_time = DEFAULT_RESET_TIME
+
+        weighting = source.get("energy_weighting", "deficit")
+        if weighting not in ENERGY_WEIGHTINGS:
+            raise ValueError(f"energy_weighting must be one of {ENERGY_WEIGHTINGS}")
+        room_valves = {room: int(n) for room, n in (source.get("room_valves") or {}).items()}
+        if any(n < 1 for n in room_valves.values()):
+            raise ValueError("room_valves counts must be at least 1")
+
+        return OrchestratorConfig(
+            gf_rooms=gf_rooms,
+            ff_rooms=ff_rooms,
+            heating_entity_overrides=overrides,
+            tick_interval=tick_interval,
+            day_reset_time=reset_time,
+            energy_sensor=source.get("energy_sensor") or None,
+            pump_power_kw=float(source.get("pump_power_kw", 0.0)),
+            energy_weighting=weighting,
+            room_valves=room_valves,
+        )
+
+    def _read_config_file(self, path: str) -> dict:
+        self._config_file_mtime = os.path.getmtime(path)
+        with open(path) as f:
+            if path.endswith(".json"):
+                data = json.load(f)
+            else:
+                import yaml  # shipped with AppDaemon
+
+                data = yaml.safe_load(f)
+        return data or {}
+
+    def _retire_room(self, room: str):
+        """Leave a room dropped from the config at the off setpoint, flag off."""
+        self._pending_user_sp.pop(room, None)
+        # Bypass an open breaker: this is the last command the room gets
+        self.unmanaged_rooms.pop(room, None)
+        self.pending_actuations.pop(room, None)
+        self._disable_room(room)
+        if room in self.pending_actuations:
+            self.log(
+                f"[RELOAD] {room} removed, but its valve could not be closed – "
+                f"left at {self.reported_sp.get(room)}°C",
+                level="WARNING",
+            )
+        self._set_heating_sensor(room, False)
+        self._reset_heating_minutes(room)
+
+    def _check_config_file(self):
+        """Reload when the optional config file changed on disk (one stat per tick)."""
+        path = (self.args or {}).get("config_file")
+        if not path:
+            return
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return
+        if mtime != self._config_file_mtime:
+            self._reload_config("config_file changed")
+
+    def _on_reload_trigger(self, entity, attribute, old, new, **kwargs):
+        self._post(self._handle_reload_trigger, entity, attribute, old, new, **kwargs)
+
+    def _handle_reload_trigger(self, entity, attribute, old, new, **kwargs):
+        if old == new:
+            return
+        self._reload_config(f"{entity} changed")
+
+    def _reload_config(self, reason: str):
+        try:
+            new = self._load_config()
+        except Exception as e:
+            self.log(f"[RELOAD] {reason}: invalid config, keeping current: {e}", level="ERROR")
+            return
+        if new == self.config:
+            return
+        self.log(f"[RELOAD] {reason}")
+        self._apply_config(new)
+
+    def _apply_config(self, new: OrchestratorConfig):
+        """Diff against the running config; touch only what changed."""
+        old = self.config
+        old_rooms = old.all_rooms if old else ()
+        added = [r for r in new.all_rooms if r not in old_rooms]
+        removed = [r for r in old_rooms if r not in new.all_rooms]
+
+        # --- Rooms removed: close the valve while the old config (heating
+        # entity overrides) still applies; nothing will manage it afterwards ---
+        for room in removed:
+            self._retire_room(room)
+        self.config = new
+
+        # --- Rooms added: state, user_sp bootstrap, setpoint listener ---
+        for room in added:
+            self.automation_guard.setdefault(room, False)
+            self.room_cooldown_until.setdefault(room, None)
+            self.reported_sp[room] = self._get_climate_setpoint(room)
+            self._room_listeners[room] = self.listen_state(
+                self._on_thermostat_change,
+                f"{CLIMATE_PREFIX}{room}",
+                attribute="temperature",
+                room=room,
+            )
+        if added:
+            self._bootstrap_user_setpoints(added)
+
+        # --- Rooms removed: listener and in-memory state ---
+        for room in removed:
+            handle = self._room_listeners.pop(room, None)
+            if handle is not None:
+                self.cancel_listen_state(handle)
+            timer = self._user_sp_timers.pop(room, None)
+            if timer is not None:
+                self.cancel_timer(timer)
+            for state in (
+                self.automation_guard,
+                self.room_cooldown_until,
+                self.unmanaged_rooms,
+                self.pending_actuations,
+                self.actuation_failures,
+                self.setpoint_targets,
+                self.reported_sp,
+                self.actuation_latency,
+                self.unconfirmed_sends,
+                self._pending_user_sp,
+                self.stale_rooms,
+                self.cooling_k,
+                self._cooling_anchor,
+                self.preheat_boost,
+            ):
+                state.pop(room, None)
+
+        # --- Energy source changed: don't integrate across two meters ---
+        if old is not None and (old.energy_sensor, old.pump_power_kw) != (
+            new.energy_sensor,
+            new.pump_power_kw,
+        ):
+            self._energy_sample = None
+
+        # --- Main tick ---
+        if old is None or old.tick_interval != new.tick_interval:
+            if self._tick_handle is not None:
+                self.cancel_timer(self._tick_handle)
+                start = self.datetime() + datetime.timedelta(seconds=new.tick_interval)
+            else:
+                start = "now"
+            self._tick_handle = self.run_every(self._tick, start, new.tick_interval)
+
+        # --- Daily reset ---
+        if old is None or old.day_reset_time != new.day_reset_time:
+            if self._reset_handle is not None:
+                self.cancel_timer(self._reset_handle)
+            self._reset_handle = self.run_daily(self._daily_reset, new.day_reset_time)
+
+        if old is not None:
+            moved = [r for r in new.gf_rooms if r in old.ff_rooms] + [
+                r for r in new.ff_rooms if r in old.gf_rooms
+            ]
+            self.log(
+                f"[RELOAD] rooms +{added} -{removed} moved={moved} "
+                f"tick={old.tick_interval}→{new.tick_interval}s "
+                f"reset={old.day_reset_time}→{new.day_reset_time}"
+            )
+
     # -----------------------------------------------------------------------
     # Bootstrap
     # -----------------------------------------------------------------------
-    def _bootstrap_user_setpoints(self):
+    def _bootstrap_user_setpoints(self, rooms):
         """On first run, seed user_sp helpers from current thermostat setpoints."""
-        for room in ALL_ROOMS:
+        for room in rooms:
             sp_entity = f"{USER_SP_PREFIX}{room}"
             current_val = self._get_number(sp_entity)
             if current_val is None or current_val < 5.0:
@@ -112,6 +870,47 @@ class HeatOrchestrator(hass.Hass):
                     self._set_number(sp_entity, 21.0)
                     self.log(f"[BOOTSTRAP] {sp_entity} fallback to 21.0")
 
+    # -----------------------------------------------------------------------
+    # HA API – timed wrappers (feed the watchdog)
+    # -----------------------------------------------------------------------
+    def get_state(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().get_state(*args, **kwargs)
+        finally:
+            self._record_latency("get_state", start)
+
+    def call_service(self, service: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().call_service(service, **kwargs)
+        finally:
+            self._record_latency(f"call_service:{service.split('/')[0]}", start)
+
+    def set_state(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().set_state(*args, **kwargs)
+        finally:
+            self._record_latency("set_state", start)
+
+    def _record_latency(self, op: str, start: float):
+        hist = self._latency.get(op)
+        if hist is None:
+            hist = self._latency[op] = LatencyHistogram()
+        hist.record((time.perf_counter() - start) * 1000.0)
+
+    def _seed_pump_cycles(self):
+        """Start the current run/rest from the last recorded pump transition."""
+        if self._pump_is_on():
+            since = self._get_datetime("input_datetime.last_pump_on")
+            if since is not None:
+                self.pump_cycles.pump_started(since.timestamp())
+        else:
+            since = self._get_datetime("input_datetime.last_pump_off")
+            if since is not None:
+                self.pump_cycles.pump_stopped(since.timestamp())
+
     # -----------------------------------------------------------------------
     # Helpers – state reading
     # -----------------------------------------------------------------------
@@ -163,6 +962,7 @@ class HeatOrchestrator(hass.Hass):
         self.call_service(
             "input_text/set_value", entity_id="input_text.heat_state", value=state
         )
+        self._decision["state"] = state
         now_str = self.datetime().strftime("%Y-%m-%d %H:%M:%S")
         self.call_service(
             "input_datetime/set_datetime",
@@ -171,7 +971,10 @@ class HeatOrchestrator(hass.Hass):
         )
 
     def _get_state_since(self) -> datetime.datetime | None:
-        val = self.get_state("input_datetime.state_since")
+        return self._get_datetime("input_datetime.state_since")
+
+    def _get_datetime(self, entity: str) -> datetime.datetime | None:
+        val = self.get_state(entity)
         if val in (None, "unknown", "unavailable", ""):
             return None
         try:
@@ -231,13 +1034,38 @@ class HeatOrchestrator(hass.Hass):
     def max_continuous_heating_min(self) -> float:
         return self._param("input_number.max_continuous_heating_min", 120.0)
 
+    @property
+    def preheat_max_boost(self) -> float:
+        return self._param("input_number.preheat_max_boost", 0.0)
+
+    @property
+    def preheat_lead_hours(self) -> float:
+        return self._param("input_number.preheat_lead_hours", 3.0)
+
+    @property
+    def preheat_allowed_drop(self) -> float:
+        return self._param("input_number.preheat_allowed_drop", 1.0)
+
+    @property
+    def stale_sensor_min(self) -> float:
+        return self._param("input_number.stale_sensor_min", 180.0)
+
+    @property
+    def watchdog_latency_ms(self) -> float:
+        return self._param("input_number.watchdog_latency_ms", 500.0)
+
+    @property
+    def watchdog_device_latency_ms(self) -> float:
+        return self._param("input_number.watchdog_device_latency_ms", 5000.0)
+
+    @property
+    def watchdog_tick_s(self) -> float:
+        return self._param("input_number.watchdog_tick_s", 10.0)
+
     # -----------------------------------------------------------------------
     # OFF window
     # -----------------------------------------------------------------------
-    def _in_off_window(self, now: datetime.datetime | None = None) -> bool:
-        if now is None:
-            now = self.datetime()
-
+    def _off_window_times(self) -> tuple[datetime.time, datetime.time]:
         start_str = self.get_state("input_datetime.off_window_start")
         end_str = self.get_state("input_datetime.off_window_end")
 
@@ -249,7 +1077,13 @@ class HeatOrchestrator(hass.Hass):
             end = datetime.datetime.strptime(end_str, "%H:%M:%S").time()
         except Exception:
             end = datetime.time(6, 0)
+        return start, end
+
+    def _in_off_window(self, now: datetime.datetime | None = None) -> bool:
+        if now is None:
+            now = self.datetime()
 
+        start, end = self._off_window_times()
         current_time = now.time()
 
         if start <= end:
@@ -271,7 +1105,30 @@ class HeatOrchestrator(hass.Hass):
             except (ValueError, TypeError):
                 pass
 
-        # Fallback: call weather.get_forecasts
+        # Fallback: cached weather.get_forecasts (hourly)
+        forecast = self._hourly_forecast()
+        if forecast:
+            t = forecast[0][1]
+            self._last_outdoor_temp = t
+            return t
+
+        # Last known or neutral
+        if self._last_outdoor_temp is not None:
+            self.log("[WARN] Using last known outdoor temp", level="WARNING")
+            return self._last_outdoor_temp
+
+        self.log("[WARN] No outdoor temp available, using 0°C", level="WARNING")
+        return 0.0
+
+    def _hourly_forecast(self) -> list[tuple[datetime.datetime, float]]:
+        """Hourly forecast as (local naive time, °C), refreshed at most hourly."""
+        now = self.datetime()
+        if self._forecast_fetched is not None and now - self._forecast_fetched < datetime.timedelta(
+            minutes=FORECAST_REFRESH_MIN
+        ):
+            return self._forecast
+
+        self._forecast_fetched = now
         try:
             resp = self.call_service(
                 "weather/get_forecasts",
@@ -279,22 +1136,20 @@ class HeatOrchestrator(hass.Hass):
                 type="hourly",
                 return_result=True,
             )
-            if resp and WEATHER_ENTITY in resp:
-                forecasts = resp[WEATHER_ENTITY].get("forecast", [])
-                if forecasts:
-                    t = float(forecasts[0]["temperature"])
-                    self._last_outdoor_temp = t
-                    return t
+            entries = (resp or {}).get(WEATHER_ENTITY, {}).get("forecast", [])
+            forecast = []
+            for entry in entries:
+                try:
+                    at = datetime.datetime.fromisoformat(entry["datetime"])
+                    if at.tzinfo is not None:
+                        at = at.astimezone().replace(tzinfo=None)
+                    forecast.append((at, float(entry["temperature"])))
+                except (KeyError, ValueError, TypeError):
+                    continue
+            self._forecast = forecast
         except Exception as e:
             self.log(f"[WARN] weather.get_forecasts failed: {e}", level="WARNING")
-
-        # Last known or neutral
-        if self._last_outdoor_temp is not None:
-            self.log("[WARN] Using last known outdoor temp", level="WARNING")
-            return self._last_outdoor_temp
-
-        self.log("[WARN] No outdoor temp available, using 0°C", level="WARNING")
-        return 0.0
+        return self._forecast
 
     # -----------------------------------------------------------------------
     # LERP-based room count calculation
@@ -326,16 +1181,21 @@ class HeatOrchestrator(hass.Hass):
     # -----------------------------------------------------------------------
     # Demand model
     # -----------------------------------------------------------------------
+    def _effective_sp(self, room: str) -> float | None:
+        """User setpoint plus any pre-heat boost planned for this tick."""
+        t_user = self._get_number(f"{USER_SP_PREFIX}{room}")
+        if t_user is None:
+            return None
+        return t_user + self.preheat_boost.get(room, 0.0)
+
     def _need_heat(self, room: str) -> bool:
         """Room needs heating: Tcur < Tuser - hyst_on."""
-        if room in self.unmanaged_rooms:
-            if self.datetime() - self.unmanaged_rooms[room] < datetime.timedelta(minutes=15):
-                return False
-            else:
-                del self.unmanaged_rooms[room]
+        if self._is_unmanaged(room) or room in self.stale_rooms:
+            return False
 
         t_cur = self._get_climate_current_temp(room)
-        t_user = self._get_number(f"{USER_SP_PREFIX}{room}")
+        t_user = self._effective_sp(room)
+        self._note_room(room, t_cur=t_cur, t_user=t_user)
         if t_cur is None or t_user is None:
             return False
         return t_cur < (t_user - self.hyst_on)
@@ -343,13 +1203,14 @@ class HeatOrchestrator(hass.Hass):
     def _satisfied(self, room: str) -> bool:
         """Room is satisfied: Tcur >= Tuser + hyst_off."""
         t_cur = self._get_climate_current_temp(room)
-        t_user = self._get_number(f"{USER_SP_PREFIX}{room}")
+        t_user = self._effective_sp(room)
+        self._note_room(room, t_cur=t_cur, t_user=t_user)
         if t_cur is None or t_user is None:
             return True
         return t_cur >= (t_user + self.hyst_off)
 
     def _need_heat_floor(self, floor: str) -> bool:
-        rooms = GF_ROOMS if floor == "GF" else FF_ROOMS
+        rooms = self._floor_rooms(floor)
         return any(self._has_demand(r) for r in rooms)
 
     def _has_demand(self, room: str) -> bool:
@@ -360,33 +1221,122 @@ class HeatOrchestrator(hass.Hass):
         This creates the proper two-threshold hysteresis band.
         """
         # Respect unmanaged room timeout
-        if room in self.unmanaged_rooms:
-            if self.datetime() - self.unmanaged_rooms[room] < datetime.timedelta(minutes=15):
-                return False
-            else:
-                del self.unmanaged_rooms[room]
+        if self._is_unmanaged(room):
+            self._note_room(room, demand=False, unmanaged=True)
+            return False
+
+        # Never heat on a temperature reading that stopped updating
+        if room in self.stale_rooms:
+            self._note_room(room, demand=False)
+            return False
 
         if self._is_room_heating(room):
             # Currently heating → keep going until satisfied (offset threshold)
-            return not self._satisfied(room)
+            demand = not self._satisfied(room)
         else:
             # Not heating → only start at onset threshold
-            return self._need_heat(room)
+            demand = self._need_heat(room)
+        self._note_room(room, demand=demand)
+        return demand
+
+    # -----------------------------------------------------------------------
+    # Pre-heating ahead of the OFF window
+    # -----------------------------------------------------------------------
+    def _update_cooling_trends(self, now: datetime.datetime):
+        """Learn each room's cooling constant k (1/h) while its valve is closed.
+
+        Newton's law: dT/dt = -k (T_in - T_out). Samples span at least
+        COOLING_SAMPLE_MIN so sensor quantisation does not dominate.
+        """
+        t_out = None
+        for room in self.config.all_rooms:
+            t_cur = self._get_climate_current_temp(room)
+            if t_cur is None or room in self.stale_rooms or self._is_room_heating(room):
+                self._cooling_anchor.pop(room, None)
+                continue
+            anchor = self._cooling_anchor.get(room)
+            if anchor is None:
+                self._cooling_anchor[room] = (now, t_cur)
+                continue
+            hours = (now - anchor[0]).total_seconds() / 3600.0
+            if hours * 60.0 < COOLING_SAMPLE_MIN:
+                continue
+            if t_out is None:
+                t_out = self._get_outdoor_temp()
+            self._cooling_anchor[room] = (now, t_cur)
+            gap = (anchor[1] + t_cur) / 2.0 - t_out
+            if gap < 2.0:
+                continue  # too close to outdoor temp to say anything
+            k = max(0.0, (anchor[1] - t_cur) / hours / gap)
+            prev = self.cooling_k.get(room)
+            self.cooling_k[room] = k if prev is None else prev + COOLING_EWMA_ALPHA * (k - prev)
+
+    def _plan_preheat(self, now: datetime.datetime):
+        """Raise targets in the hours before the OFF window so rooms coast through it.
+
+        For a room at T0 cooling towards the mean forecast night temperature
+        T_n for the lockout length D, the temperature at the end is
+        T_n + (T0 - T_n)·e^(-kD). The boost is the smallest T0 - T_user that
+        keeps that at or above T_user - allowed_drop, clamped to max_boost.
+        O(rooms + forecast hours) per tick.
+        """
+        max_boost = self.preheat_max_boost
+        start, end = self._off_window_times()
+        window_start = datetime.datetime.combine(now.date(), start)
+        if window_start <= now:
+            window_start += datetime.timedelta(days=1)
+        lead = datetime.timedelta(hours=self.preheat_lead_hours)
+
+        if max_boost <= 0 or now < window_start - lead:
+            if self.preheat_boost:
+                self.log("[PREHEAT] ended")
+            self.preheat_boost = {}
+            return
+
+        window_end = datetime.datetime.combine(window_start.date(), end)
+        if window_end <= window_start:
+            window_end += datetime.timedelta(days=1)
+        duration_h = (window_end - window_start).total_seconds() / 3600.0
+
+        night = [t for at, t in self._hourly_forecast() if window_start <= at < window_end]
+        t_night = sum(night) / len(night) if night else self._get_outdoor_temp()
+        allowed = self.preheat_allowed_drop
+
+        boost = {}
+        for room, k in self.cooling_k.items():
+            t_user = self._get_number(f"{USER_SP_PREFIX}{room}")
+            if t_user is None or k <= 0 or room not in self.config.all_rooms:
+                continue
+            floor_temp = t_user - allowed
+            if floor_temp <= t_night:
+                continue
+            needed = t_night + (floor_temp - t_night) * math.exp(k * duration_h) - t_user
+            # Half-degree steps keep thermostat writes from chasing forecast noise
+            needed = min(max_boost, math.ceil(max(0.0, needed) * 2.0) / 2.0)
+            if needed > 0:
+                boost[room] = needed
+
+        if boost != self.preheat_boost:
+            self.log(
+                f"[PREHEAT] Tnight={t_night:.1f} lockout={duration_h:.1f}h boost={boost}"
+            )
+        self.preheat_boost = boost
 
     # -----------------------------------------------------------------------
     # Scoring
     # -----------------------------------------------------------------------
     def _room_score(self, room: str) -> float:
         t_cur = self._get_climate_current_temp(room)
-        t_user = self._get_number(f"{USER_SP_PREFIX}{room}")
+        t_user = self._effective_sp(room)
         priority = self._param(f"{PRIORITY_PREFIX}{room}", 50.0)
         if t_cur is None or t_user is None:
             return 0.0
         deficit = max(0.0, t_user - t_cur)
+        self._note_room(room, priority=priority, score=deficit * priority)
         return deficit * priority
 
     def _floor_score(self, floor: str) -> float:
-        rooms = GF_ROOMS if floor == "GF" else FF_ROOMS
+        rooms = self._floor_rooms(floor)
         scores = [self._room_score(r) for r in rooms if self._has_demand(r)]
         return max(scores) if scores else 0.0
 
@@ -395,7 +1345,7 @@ class HeatOrchestrator(hass.Hass):
     # -----------------------------------------------------------------------
     def _is_room_heating(self, room: str) -> bool:
         """Check if a room is currently being heated (heating sensor is on)."""
-        entity = self._HEATING_ENTITY_OVERRIDES.get(room, f"{HEATING_PREFIX}{room}")
+        entity = self.config.heating_entity_overrides.get(room, f"{HEATING_PREFIX}{room}")
         try:
             state = self.get_state(entity)
             return state == "on"
@@ -421,75 +1371,30 @@ class HeatOrchestrator(hass.Hass):
     def _enable_room(self, room: str):
         t_user = self._get_number(f"{USER_SP_PREFIX}{room}")
         if t_user is None or t_user < 5.0 or t_user > 30.0:
-            climate_sp = self._get_climate_setpoint(room)
+            climate_sp = self.reported_sp.get(room)
             if climate_sp is not None and 15.0 <= climate_sp <= 30.0:
                 t_user = climate_sp
             else:
                 t_user = 21.0
+        t_user = min(30.0, t_user + self.preheat_boost.get(room, 0.0))
 
-        entity = f"{CLIMATE_PREFIX}{room}"
-        current_sp = self._get_climate_setpoint(room)
-        if current_sp is not None and abs(current_sp - t_user) < 0.05:
-            self._set_heating_sensor(room, True)
-            return  # already correct
-
-        self.automation_guard[room] = True
-        try:
-            self.call_service(
-                "climate/set_temperature", entity_id=entity, temperature=t_user
-            )
+        if self._reconcile(room, t_user, heating=True):
             self.log(f"[ROOM] enable {room} → {t_user}°C")
-            self._set_heating_sensor(room, True)
-        except Exception as e:
-            self.log(f"[ERROR] enable_room {room}: {e}", level="ERROR")
-            # Retry once
-            try:
-                self.call_service(
-                    "climate/set_temperature", entity_id=entity, temperature=t_user
-                )
-                self._set_heating_sensor(room, True)
-            except Exception as e2:
-                self.log(f"[ERROR] enable_room {room} retry failed: {e2}", level="ERROR")
-                self.unmanaged_rooms[room] = self.datetime()
-
-        self.run_in(self._release_guard, GUARD_RELEASE_DELAY, room=room)
 
     def _disable_room(self, room: str):
-        entity = f"{CLIMATE_PREFIX}{room}"
         off_sp = self.room_off_setpoint
-        current_sp = self._get_climate_setpoint(room)
-        if current_sp is not None and abs(current_sp - off_sp) < 0.05:
-            self._set_heating_sensor(room, False)
-            return  # already at off setpoint
-
-        self.automation_guard[room] = True
-        try:
-            self.call_service(
-                "climate/set_temperature", entity_id=entity, temperature=off_sp
-            )
+        if self._reconcile(room, off_sp, heating=False):
             self.log(f"[ROOM] disable {room} → {off_sp}°C")
-            self._set_heating_sensor(room, False)
-        except Exception as e:
-            self.log(f"[ERROR] disable_room {room}: {e}", level="ERROR")
-            try:
-                self.call_service(
-                    "climate/set_temperature", entity_id=entity, temperature=off_sp
-                )
-                self._set_heating_sensor(room, False)
-            except Exception as e2:
-                self.log(f"[ERROR] disable_room {room} retry failed: {e2}", level="ERROR")
-                self.unmanaged_rooms[room] = self.datetime()
-
-        self.run_in(self._release_guard, GUARD_RELEASE_DELAY, room=room)
 
-    # Mapping for rooms whose input_boolean entity ID differs from room_id
+    # Default mapping for rooms whose input_boolean entity ID differs from
+    # room_id (overridable via the heating_entity_overrides arg)
     _HEATING_ENTITY_OVERRIDES: dict[str, str] = {
         "salon": "input_boolean.heating_salon_2",
     }
 
     def _set_heating_sensor(self, room: str, heating: bool):
         """Update the per-room heating status input_boolean."""
-        entity = self._HEATING_ENTITY_OVERRIDES.get(room, f"{HEATING_PREFIX}{room}")
+        entity = self.config.heating_entity_overrides.get(room, f"{HEATING_PREFIX}{room}")
         try:
             current = self.get_state(entity)
             target = "on" if heating else "off"
@@ -501,31 +1406,239 @@ class HeatOrchestrator(hass.Hass):
             self.log(f"[WARN] heating sensor {entity}: {e}", level="WARNING")
 
     def _release_guard(self, **kwargs):
+        self._post(self._run_release_guard, **kwargs)
+
+    def _run_release_guard(self, **kwargs):
         room = kwargs.get("room")
-        if room:
+        if room in self.automation_guard:  # not for rooms removed meanwhile
             self.automation_guard[room] = False
 
+    # -----------------------------------------------------------------------
+    # Actuation retry queue / circuit breaker
+    # -----------------------------------------------------------------------
+    def _is_unmanaged(self, room: str) -> bool:
+        """True while the room's circuit breaker is open."""
+        since = self.unmanaged_rooms.get(room)
+        if since is None:
+            return False
+        if self.datetime() - since < datetime.timedelta(minutes=UNMANAGED_TIMEOUT_MIN):
+            return True
+        # Timeout elapsed → half-open: the next actuation acts as a probe
+        del self.unmanaged_rooms[room]
+        return False
+
+    def _actuate(self, room: str, temperature: float, heating: bool) -> bool:
+        """Write a room setpoint once; on failure hand it to the retry queue.
+
+        Returns True only if the command landed during this call. Never
+        retries inline, so a flapping thermostat cannot stall the tick.
+        """
+        self.setpoint_targets[room] = SetpointTarget(temperature, heating)
+        pending = self.pending_actuations.get(room)
+        if pending is not None:
+            # Coalesce with the queued command – the retry sends the latest target
+            pending.temperature = temperature
+            return False
+
+        if self._is_unmanaged(room):
+            return False
+
+        if self._send_setpoint(room, temperature):
+            self.actuation_failures.pop(room, None)
+            return True
+
+        self._actuation_failed(room, PendingActuation(temperature))
+        return False
+
+    def _send_setpoint(self, room: str, temperature: float) -> bool:
+        entity = f"{CLIMATE_PREFIX}{room}"
+        self.automation_guard[room] = True
+        try:
+            self.call_service(
+                "climate/set_temperature", entity_id=entity, temperature=temperature
+            )
+            ok = True
+        except Exception as e:
+            self.log(f"[ERROR] set_temperature {room} → {temperature}°C: {e}", level="ERROR")
+            ok = False
+        self.run_in(self._release_guard, GUARD_RELEASE_DELAY, room=room)
+        target = self.setpoint_targets.get(room)
+        if ok and target is not None:
+            target.sent_at = time.monotonic()
+        return ok
+
+    def _actuation_failed(self, room: str, command: PendingActuation):
+        """Count a failure; trip the breaker or schedule a backed-off retry."""
+        failures = self.actuation_failures.get(room, 0) + 1
+        self.actuation_failures[room] = failures
+
+        if failures >= BREAKER_FAILURE_THRESHOLD:
+            self._open_breaker(room, f"{failures} failed actuations")
+            return
+
+        # Doubles per failure; the breaker trips before this can grow large
+        delay = ACTUATION_RETRY_BASE * 2 ** (failures - 1)
+        delay *= random.uniform(1 - ACTUATION_RETRY_JITTER, 1 + ACTUATION_RETRY_JITTER)
+        self.pending_actuations[room] = command
+        self.run_in(self._retry_actuation, delay, room=room)
+        self.log(f"[RETRY] {room} → {command.temperature}°C in {delay:.0f}s (failure {failures})")
+
+    def _open_breaker(self, room: str, reason: str):
+        self.unmanaged_rooms[room] = self.datetime()
+        self.log(
+            f"[ERROR] {room} unmanaged for {UNMANAGED_TIMEOUT_MIN} min after {reason}",
+            level="ERROR",
+        )
+
+    def _retry_actuation(self, **kwargs):
+        self._post(self._run_retry_actuation, **kwargs)
+
+    def _run_retry_actuation(self, **kwargs):
+        room = kwargs.get("room")
+        command = self.pending_actuations.pop(room, None)
+        if command is None:
+            return
+
+        if self._send_setpoint(room, command.temperature):
+            self.actuation_failures.pop(room, None)
+            self.log(f"[RETRY] {room} → {command.temperature}°C sent")
+        else:
+            self._actuation_failed(room, command)
+
+    # -----------------------------------------------------------------------
+    # Actuation reconciler
+    # -----------------------------------------------------------------------
+    def _reconcile(self, room: str, temperature: float, heating: bool) -> bool:
+        """Drive a thermostat towards ``temperature`` using reported state only.
+
+        Sends only for a new target, observed drift, or a send that was never
+        reported back within the confirm timeout. Unreported sends are
+        re-sent with a doubling timeout and counted apart from call_service
+        errors; BREAKER_FAILURE_THRESHOLD in a row open the breaker.
+        The heating flag follows confirmation, not the send. Nothing is sent
+        while a user setpoint change is settling – ``user_sp`` still holds
+        the old value, and the commit re-evaluates the room. Returns True
+        if a command was sent now.
+        """
+        if room in self._pending_user_sp:
+            return False
+        target = self.setpoint_targets.get(room)
+        reported = self.reported_sp.get(room)
+        at_target = reported is not None and abs(reported - temperature) < 0.05
+
+        if target is None or abs(target.temperature - temperature) >= 0.05 or target.heating != heating:
+            if at_target:
+                self.setpoint_targets[room] = SetpointTarget(temperature, heating, confirmed=True)
+                self.unconfirmed_sends.pop(room, None)
+                self._set_heating_sensor(room, heating)
+                return False
+            return self._actuate(room, temperature, heating)
+
+        if target.confirmed:
+            if at_target or reported is None:
+                return False
+            self.log(
+                f"[DRIFT] {room} reports {reported}°C, expected {temperature}°C – re-issuing",
+                level="WARNING",
+            )
+            return self._actuate(room, temperature, heating)
+
+        if room in self.pending_actuations:
+            return False  # retry already scheduled
+        if target.sent_at is None:
+            return self._actuate(room, temperature, heating)  # breaker was open
+        unconfirmed = self.unconfirmed_sends.get(room, 0)
+        timeout = self._confirm_timeout * 2 ** min(unconfirmed, BREAKER_FAILURE_THRESHOLD - 1)
+        if time.monotonic() - target.sent_at <= timeout:
+            return False
+        unconfirmed += 1
+        self.unconfirmed_sends[room] = unconfirmed
+        if unconfirmed >= BREAKER_FAILURE_THRESHOLD:
+            target.sent_at = None  # re-sent as the probe once the breaker half-opens
+            self._open_breaker(room, f"{unconfirmed} setpoints never reported")
+            return False
+        self.log(
+            f"[DRIFT] {room} never reported {temperature}°C ({timeout:.0f}s) – re-issuing",
+            level="WARNING",
+        )
+        return self._actuate(room, temperature, heating)
+
+    def _on_setpoint_reported(self, room: str, reported: float | None) -> bool:
+        """Record a reported setpoint; True if it confirms our own command."""
+        self.reported_sp[room] = reported
+        target = self.setpoint_targets.get(room)
+        if target is None or reported is None or abs(reported - target.temperature) >= 0.05:
+            return False
+        if not target.confirmed:
+            target.confirmed = True
+            self.unconfirmed_sends.pop(room, None)
+            if target.sent_at is not None:
+                hist = self.actuation_latency.get(room)
+                if hist is None:
+                    hist = self.actuation_latency[room] = LatencyHistogram()
+                hist.record((time.monotonic() - target.sent_at) * 1000.0)
+            self._set_heating_sensor(room, target.heating)
+        return True
+
     # -----------------------------------------------------------------------
     # User setpoint listener
     # -----------------------------------------------------------------------
     def _on_thermostat_change(self, entity, attribute, old, new, **kwargs):
+        self._post(self._profiled, self._handle_thermostat_change, entity, attribute, old, new, **kwargs)
+
+    def _handle_thermostat_change(self, entity, attribute, old, new, **kwargs):
         room = kwargs.get("room")
         if room is None:
             return
 
+        try:
+            new_val = float(new) if new is not None else None
+        except (ValueError, TypeError):
+            new_val = None
+        if self._on_setpoint_reported(room, new_val):
+            # Mid-burst this is where the user left the dial, not an echo:
+            # it becomes the value to commit (a no-op if user_sp holds it)
+            pending = self._pending_user_sp.get(room)
+            if pending is not None:
+                self._pending_user_sp[room] = (new_val, time.monotonic(), pending[2] + 1)
+            return  # Echo of our own command
+
         if self.automation_guard.get(room, False):
             return  # Automation-driven change, ignore
 
-        if new is None:
+        if new_val is None:
             return
 
-        try:
-            new_val = float(new)
-        except (ValueError, TypeError):
+        if not (5.0 <= new_val <= 30.0):
             return
 
-        if not (5.0 <= new_val <= 30.0):
+        # Coalesce: only the value left after a quiet period is committed
+        pending = self._pending_user_sp.get(room)
+        events = pending[2] + 1 if pending is not None else 1
+        self._pending_user_sp[room] = (new_val, time.monotonic(), events)
+        if room not in self._user_sp_timers:
+            self._user_sp_timers[room] = self.run_in(
+                self._commit_user_sp, self._user_sp_settle, room=room
+            )
+
+    def _commit_user_sp(self, **kwargs):
+        self._post(self._run_commit_user_sp, **kwargs)
+
+    def _run_commit_user_sp(self, **kwargs):
+        room = kwargs.get("room")
+        self._user_sp_timers.pop(room, None)
+        pending = self._pending_user_sp.get(room)
+        if pending is None:
+            return
+        new_val, last_event, events = pending
+        quiet = time.monotonic() - last_event
+        if quiet < self._user_sp_settle:
+            # Still moving – wait out the rest of the quiet period
+            self._user_sp_timers[room] = self.run_in(
+                self._commit_user_sp, math.ceil(self._user_sp_settle - quiet), room=room
+            )
             return
+        del self._pending_user_sp[room]
 
         sp_entity = f"{USER_SP_PREFIX}{room}"
         current_user_sp = self._get_number(sp_entity)
@@ -534,7 +1647,17 @@ class HeatOrchestrator(hass.Hass):
             return  # No change
 
         self._set_number(sp_entity, new_val)
-        self.log(f"[USER] {room} setpoint changed to {new_val}°C")
+        self.log(f"[USER] {room} setpoint changed to {new_val}°C ({events} events)")
+
+        # Push the new target to a room that is heating now instead of
+        # waiting for the next tick; everything else is left to the tick
+        decision = self._decision
+        if (
+            self._user_sp_reevaluate
+            and decision["state"] in (STATE_HEAT_GF, STATE_HEAT_FF)
+            and room in decision["rooms"]
+        ):
+            self._enable_room(room)
 
     def _on_weather_change(self, entity, attribute, old, new, **kwargs):
         pass  # Tick handles weather; this is placeholder for potential future use
@@ -546,7 +1669,9 @@ class HeatOrchestrator(hass.Hass):
         if self._pump_is_on():
             return
         self.call_service("switch/turn_on", entity_id=PUMP_SWITCH)
-        now_str = self.datetime().strftime("%Y-%m-%d %H:%M:%S")
+        now = self.datetime()
+        self.pump_cycles.pump_started(now.timestamp())
+        now_str = now.strftime("%Y-%m-%d %H:%M:%S")
         self.call_service(
             "input_datetime/set_datetime",
             entity_id="input_datetime.last_pump_on",
@@ -561,7 +1686,9 @@ class HeatOrchestrator(hass.Hass):
         if not self._pump_is_on():
             return
         self.call_service("input_button/press", entity_id=PUMP_OFF_BUTTON)
-        now_str = self.datetime().strftime("%Y-%m-%d %H:%M:%S")
+        now = self.datetime()
+        self.pump_cycles.pump_stopped(now.timestamp())
+        now_str = now.strftime("%Y-%m-%d %H:%M:%S")
         self.call_service(
             "input_datetime/set_datetime",
             entity_id="input_datetime.last_pump_off",
@@ -612,7 +1739,7 @@ class HeatOrchestrator(hass.Hass):
         Returns:
             List of eligible rooms (not sorted, not LERP-limited).
         """
-        rooms = GF_ROOMS if floor == "GF" else FF_ROOMS
+        rooms = self._floor_rooms(floor)
         now = self.datetime()
         
         candidates = []
@@ -664,7 +1791,7 @@ class HeatOrchestrator(hass.Hass):
         def sort_key(r):
             prio = self._param(f"{PRIORITY_PREFIX}{r}", 50.0)
             t_cur = self._get_climate_current_temp(r) or 0.0
-            t_user = self._get_number(f"{USER_SP_PREFIX}{r}") or 21.0
+            t_user = self._effective_sp(r) or 21.0
             deficit = max(0.0, t_user - t_cur)
             return (-prio, -deficit)
 
@@ -675,7 +1802,7 @@ class HeatOrchestrator(hass.Hass):
         max_rooms_lerp = self._lerp_max_rooms(t_out)
         
         # Clamp to floor room count
-        rooms = GF_ROOMS if floor == "GF" else FF_ROOMS
+        rooms = self._floor_rooms(floor)
         max_rooms_for_floor = len(rooms)
         max_rooms = min(max_rooms_lerp, max_rooms_for_floor)
         
@@ -688,11 +1815,14 @@ class HeatOrchestrator(hass.Hass):
     # Daily reset
     # -----------------------------------------------------------------------
     def _daily_reset(self, **kwargs):
+        self._post(self._run_daily_reset, **kwargs)
+
+    def _run_daily_reset(self, **kwargs):
         self._set_number("input_number.pump_on_minutes_today", 0)
         self._set_number("input_number.pump_starts_today", 0)
         
         # Clear all cooldown states and heating minute counters
-        for room in ALL_ROOMS:
+        for room in self.config.all_rooms:
             self.room_cooldown_until[room] = None
             self._reset_heating_minutes(room)
         
@@ -702,21 +1832,50 @@ class HeatOrchestrator(hass.Hass):
     # Main tick
     # -----------------------------------------------------------------------
     def _tick(self, **kwargs):
+        self._post(self._profiled, self._run_tick, **kwargs)
+
+    def _run_tick(self, **kwargs):
+        tick_start = time.perf_counter()
         now = self.datetime()
         self._tick_counter += 1
         current_state = self._get_fsm_state()
+        self._decision["state"] = current_state
+        self._tick_rooms = {}
+
+        self._check_stale_rooms()
+        self._update_degraded_mode()
+        # The interval that just ended ran at the old rate if this reloads
+        tick_min = self.config.tick_interval / 60.0
+        self._check_config_file()
+        self._update_cooling_trends(now)
+        self._plan_preheat(now)
 
         # --- Pump run-time accounting ---
         if self._pump_is_on():
             on_min = self._get_number("input_number.pump_on_minutes_today") or 0.0
-            self._set_number("input_number.pump_on_minutes_today", on_min + 1)
+            self._set_number("input_number.pump_on_minutes_today", on_min + tick_min)
 
         # --- Per-room heating minutes accounting ---
-        for room in ALL_ROOMS:
-            if self._is_room_heating(room):
-                mins = self._get_heating_minutes(room)
-                self._set_heating_minutes(room, mins + 1)
-
+        heating_rooms = [r for r in self.config.all_rooms if self._is_room_heating(r)]
+        for room in heating_rooms:
+            mins = self._get_heating_minutes(room)
+            self._set_heating_minutes(room, mins + tick_min)
+
+        # --- Energy attribution for the interval that just ended ---
+        self._account_energy(now, current_state, heating_rooms, tick_min)
+
+        self._decide(now, current_state)
+        self._record_latency("tick", tick_start)
+
+        # --- Update diagnostic sensors (non-essential, skipped when degraded) ---
+        if not self.degraded:
+            self._update_diagnostics()
+            self._publish_pump_cycles(now)
+            self._publish_energy()
+        self._publish_watchdog()
+
+    def _decide(self, now: datetime.datetime, current_state: str):
+        """Run the FSM for one tick: pick state, floor and rooms, drive the pump."""
         # --- 1. OFF window check ---
         if self._in_off_window(now):
             if self._pump_is_on():
@@ -751,6 +1910,7 @@ class HeatOrchestrator(hass.Hass):
         score_ff = self._floor_score("FF") if demand_ff else 0.0
 
         t_out = self._get_outdoor_temp()
+        self._decision["t_out"] = t_out
 
         # --- 3. If pump is OFF ---
         if not self._pump_is_on():
@@ -840,10 +2000,9 @@ class HeatOrchestrator(hass.Hass):
                 self._set_fsm_state(new_state)
 
             if self._tick_counter % self._log_every_n_ticks == 0:
-                selected = self._select_rooms(active_floor)
                 self.log(
                     f"[DECISION] state={new_state} floor={active_floor} "
-                    f"rooms={selected} Tout={t_out:.1f} "
+                    f"rooms={self._decision['rooms']} Tout={t_out:.1f} "
                     f"quota_remaining={remaining_quota:.0f}"
                 )
 
@@ -873,17 +2032,16 @@ class HeatOrchestrator(hass.Hass):
                         f"({mins_on_str}/{self.min_pump_on:.0f} min) before OFF"
                     )
 
-        # --- Update diagnostic helpers ---
-        self._update_diagnostics()
-
     # -----------------------------------------------------------------------
     # Apply floor selection (enable selected rooms, disable rest)
     # -----------------------------------------------------------------------
     def _apply_floor(self, floor: str):
-        active_rooms = GF_ROOMS if floor == "GF" else FF_ROOMS
-        inactive_rooms = FF_ROOMS if floor == "GF" else GF_ROOMS
+        active_rooms = self._floor_rooms(floor)
+        inactive_rooms = self._floor_rooms("FF" if floor == "GF" else "GF")
 
         selected = self._select_rooms(floor)
+        self._decision["floor"] = floor
+        self._decision["rooms"] = selected
 
         for room in active_rooms:
             if room in selected:
@@ -896,44 +2054,401 @@ class HeatOrchestrator(hass.Hass):
             self._reset_heating_minutes(room)
 
     def _disable_all_rooms(self):
-        for room in ALL_ROOMS:
+        self._decision["floor"] = "none"
+        self._decision["rooms"] = []
+        for room in self.config.all_rooms:
             self._disable_room(room)
             self._reset_heating_minutes(room)
 
     # -----------------------------------------------------------------------
-    # Diagnostics
+    # Single-writer event loop
     # -----------------------------------------------------------------------
-    def _update_diagnostics(self):
-        """Update optional diagnostic entities."""
+    def _post(self, fn, *args, **kwargs):
+        """Hand a callback to the writer thread; the only way state is changed."""
+        self._writer.post(fn, *args, **kwargs)
+
+    def _on_writer_error(self, fn, exc: Exception):
+        name = getattr(fn, "__name__", repr(fn))
+        self.log(f"[ERROR] {name} failed: {exc}\n{traceback.format_exc()}", level="ERROR")
+
+    # -----------------------------------------------------------------------
+    # Profiling
+    # -----------------------------------------------------------------------
+    def _profiled(self, fn, *args, **kwargs):
+        profiler = self.profiler
+        if profiler is None:
+            return fn(*args, **kwargs)
+        return profiler.run(fn, *args, **kwargs)
+
+    def _on_profiling_toggle(self, entity, attribute, old, new, **kwargs):
+        self._post(self._set_profiling, new == "on")
+
+    def _set_profiling(self, enabled: bool):
+        if enabled and self.profiler is None:
+            args = self.args or {}
+            self.profiler = TickProfiler(
+                directory=args.get("profile_dir", PROFILE_DIR),
+                every_n=int(args.get("profile_every_n", PROFILE_EVERY_N)),
+                window=int(args.get("profile_window", PROFILE_WINDOW)),
+                trace_alloc=bool(args.get("profile_tracemalloc", False)),
+            )
+            self.log(
+                f"[PROFILE] enabled: 1 in {self.profiler.every_n} calls, "
+                f"{self.profiler.window} samples/report → {self.profiler.directory}"
+            )
+        elif not enabled and self.profiler is not None:
+            profiler, self.profiler = self.profiler, None
+            for path in profiler.close():
+                self.log(f"[PROFILE] report written: {path}")
+            self.log("[PROFILE] disabled")
+
+    def terminate(self):
+        # Flushed as the last events on the writer, never beside a slow handler
+        self._post(self._set_profiling, False)
+        self._post(self._save_energy)
+        if not self._writer.stop(WRITER_STOP_TIMEOUT):
+            self.log(
+                f"[WRITER] queued events still running after {WRITER_STOP_TIMEOUT}s, abandoning "
+                f"(profiler and energy store not flushed)",
+                level="WARNING",
+            )
+
+    # -----------------------------------------------------------------------
+    # Energy attribution
+    # -----------------------------------------------------------------------
+    def _read_energy_sample(self) -> tuple[str, float] | None:
+        """("power", kW) or ("energy", kWh) from the sensor, else nominal power."""
+        entity = self.config.energy_sensor
+        if not entity:
+            if self.config.pump_power_kw <= 0:
+                return None
+            return "nominal", self.config.pump_power_kw if self._pump_is_on() else 0.0
+        full = self.get_state(entity, attribute="all") or {}
+        unit = (full.get("attributes") or {}).get("unit_of_measurement")
+        kind, scale = ENERGY_UNITS.get(unit, (None, 0.0))
         try:
-            state = self._get_fsm_state()
-            active_floor = "none"
-            if state == STATE_HEAT_GF:
-                active_floor = "GF"
-            elif state == STATE_HEAT_FF:
-                active_floor = "FF"
+            value = float(full.get("state"))
+        except (ValueError, TypeError):
+            return None
+        if kind is None:
+            self.log(f"[WARN] {entity}: unsupported unit {unit!r}", level="WARNING")
+            return None
+        return kind, value * scale
 
-            # Active floor
-            floor_entity = "input_text.active_floor"
-            if self.entity_exists(floor_entity):
-                self.call_service(
-                    "input_text/set_value",
-                    entity_id=floor_entity,
-                    value=active_floor,
-                )
+    def _account_energy(
+        self, now: datetime.datetime, state: str, heating_rooms: list[str], tick_min: float
+    ):
+        """Credit heating time and attribute pump energy since the previous
+        tick to the rooms heating during that interval (O(heating rooms)).
 
-            # Active rooms
-            rooms_entity = "input_text.active_rooms"
-            if self.entity_exists(rooms_entity):
-                if active_floor in ("GF", "FF"):
-                    selected = self._select_rooms(active_floor)
-                    rooms_str = ",".join(selected)
-                else:
-                    rooms_str = ""
-                self.call_service(
-                    "input_text/set_value",
-                    entity_id=rooms_entity,
-                    value=rooms_str,
-                )
-        except Exception:
-            pass  # Diagnostics are optional
+        Heating time is always credited; energy only while a source is
+        configured and readable.
+        """
+        kwh = self._interval_kwh(now)
+        if kwh <= 0:
+            weights = {}
+        elif state == STATE_DHW_QUOTA:
+            weights = {EnergyLedger.DHW: 1.0}
+        elif not heating_rooms:
+            weights = {EnergyLedger.OTHER: 1.0}
+        elif self.config.energy_weighting == "valves":
+            weights = {room: float(self.config.room_valves.get(room, 1)) for room in heating_rooms}
+        else:
+            weights = {}
+            for room in heating_rooms:
+                t_cur = self._get_climate_current_temp(room)
+                t_user = self._effective_sp(room)
+                deficit = t_user - t_cur if t_cur is not None and t_user is not None else 0.0
+                weights[room] = max(deficit, 0.0) + ENERGY_DEFICIT_FLOOR
+        self.energy.add(now.date(), kwh, weights, heating_rooms, tick_min)
+
+        if self._tick_counter % ENERGY_SAVE_TICKS == 0:
+            self._save_energy()
+
+    def _interval_kwh(self, now: datetime.datetime) -> float:
+        """Pump energy since the previous sample; 0 when it can't be known."""
+        sample = self._read_energy_sample()
+        prev = self._energy_sample
+        self._energy_sample = (now, *sample) if sample is not None else None
+        if prev is None or sample is None:
+            return 0.0
+        prev_at, prev_kind, prev_value = prev
+        kind, value = sample
+        hours = (now - prev_at).total_seconds() / 3600.0
+        if hours <= 0 or kind != prev_kind:
+            return 0.0
+
+        if kind == "energy":
+            return value - prev_value if value >= prev_value else value  # meter reset
+        if hours * 3600.0 > ENERGY_MAX_GAP_TICKS * self.config.tick_interval:
+            return 0.0
+        if kind == "power":
+            return (value + prev_value) / 2.0 * hours
+        return value * hours  # nominal: the pump state held for the interval
+
+    def _save_energy(self):
+        try:
+            self.energy.save()
+        except OSError as e:
+            self.log(f"[WARN] energy store {self.energy.path}: {e}", level="WARNING")
+
+    def _publish_energy(self):
+        ledger = self.energy
+        if not ledger.day:
+            return
+
+        def kwh(value: float | None) -> float:
+            return round(value or 0.0, 2)
+
+        for period, totals, minutes in (
+            ("today", ledger.kwh_today, ledger.min_today),
+            ("month", ledger.kwh_month, ledger.min_month),
+        ):
+            self._publish(
+                f"sensor.heat_energy_{period}",
+                kwh(sum(totals.values())),
+                {
+                    "friendly_name": f"Heating Energy ({period})",
+                    "unit_of_measurement": "kWh",
+                    "device_class": "energy",
+                    "state_class": "total_increasing",
+                    "icon": "mdi:lightning-bolt",
+                    "rooms": {room: kwh(totals.get(room)) for room in self.config.all_rooms},
+                    "dhw": kwh(totals.get(EnergyLedger.DHW)),
+                    "other": kwh(totals.get(EnergyLedger.OTHER)),
+                    "heating_minutes": {
+                        room: round(minutes.get(room, 0.0)) for room in self.config.all_rooms
+                    },
+                },
+            )
+        for room in self.config.all_rooms:
+            self._publish(
+                f"sensor.heat_energy_{room}",
+                kwh(ledger.kwh_month.get(room)),
+                {
+                    "friendly_name": f"Heating Energy {room} (month)",
+                    "unit_of_measurement": "kWh",
+                    "device_class": "energy",
+                    "state_class": "total_increasing",
+                    "icon": "mdi:radiator",
+                    "today_kwh": kwh(ledger.kwh_today.get(room)),
+                    "heating_minutes_today": round(ledger.min_today.get(room, 0.0)),
+                    "heating_minutes_month": round(ledger.min_month.get(room, 0.0)),
+                },
+            )
+
+    # -----------------------------------------------------------------------
+    # Pump cycle analytics
+    # -----------------------------------------------------------------------
+    def _publish_pump_cycles(self, now: datetime.datetime):
+        stats = self.pump_cycles
+        ts = now.timestamp()
+        starts_1h = stats.starts_within(stats.HOUR, ts)
+        last_run = stats.run_lengths.last
+        last_rest = stats.rest_lengths.last
+        short_cycling = (
+            starts_1h >= SHORT_CYCLE_STARTS_1H
+            or (last_run is not None and last_run < self.min_pump_on * 60.0)
+            or (last_rest is not None and last_rest < self.min_pump_off * 60.0)
+        )
+
+        def minutes(seconds: float | None):
+            return round(seconds / 60.0) if seconds is not None else None
+
+        for window, starts in (
+            ("1h", starts_1h),
+            ("24h", stats.starts_within(stats.DAY, ts)),
+            ("7d", stats.starts_within(stats.WEEK, ts)),
+        ):
+            self._publish(
+                f"sensor.heat_pump_starts_{window}",
+                starts,
+                {"friendly_name": f"Heat Pump Starts ({window})", "icon": "mdi:counter"},
+            )
+        self._publish(
+            "sensor.heat_pump_mean_run",
+            minutes(stats.run_lengths.mean),
+            {
+                "friendly_name": "Heat Pump Mean Run",
+                "unit_of_measurement": "min",
+                "icon": "mdi:timer",
+                "last_run_min": minutes(last_run),
+            },
+        )
+        self._publish(
+            "sensor.heat_pump_mean_rest",
+            minutes(stats.rest_lengths.mean),
+            {
+                "friendly_name": "Heat Pump Mean Rest",
+                "unit_of_measurement": "min",
+                "icon": "mdi:timer-off",
+                "last_rest_min": minutes(last_rest),
+            },
+        )
+        self._publish(
+            "sensor.heat_pump_duty_cycle_24h",
+            round(stats.duty_cycle_24h(ts) * 100),
+            {
+                "friendly_name": "Heat Pump Duty Cycle (24h)",
+                "unit_of_measurement": "%",
+                "icon": "mdi:percent",
+            },
+        )
+        self._publish(
+            "binary_sensor.heat_pump_short_cycling",
+            "on" if short_cycling else "off",
+            {"friendly_name": "Heat Pump Short Cycling", "device_class": "problem"},
+        )
+
+    # -----------------------------------------------------------------------
+    # Watchdog – stale data and degraded mode
+    # -----------------------------------------------------------------------
+    def _check_stale_rooms(self):
+        """Flag rooms whose thermostat has not reported within stale_sensor_min."""
+        limit = self.stale_sensor_min
+        for room in self.config.all_rooms:
+            entity = f"{CLIMATE_PREFIX}{room}"
+            last_seen = None
+            try:
+                full = self.get_state(entity, attribute="all")
+                if full:
+                    # last_updated only moves on a change; a thermostat in a
+                    # stable room re-reports the same state (HA ≥ 2024.3)
+                    last_seen = full.get("last_reported") or full.get("last_updated")
+                age = self._age_minutes(last_seen)
+            except Exception:
+                age = None
+
+            if age is not None and age > limit:
+                if room not in self.stale_rooms:
+                    self.log(
+                        f"[WATCHDOG] {room} stale: no update for {age:.0f} min, excluded",
+                        level="WARNING",
+                    )
+                self.stale_rooms[room] = last_seen
+            elif room in self.stale_rooms:
+                del self.stale_rooms[room]
+                self.log(f"[WATCHDOG] {room} reporting again")
+
+    def _age_minutes(self, iso: str | None) -> float | None:
+        if not iso:
+            return None
+        try:
+            ts = datetime.datetime.fromisoformat(iso)
+        except (ValueError, TypeError):
+            return None
+        now = self.datetime(aware=True) if ts.tzinfo is not None else self.datetime()
+        return (now - ts).total_seconds() / 60.0
+
+    def _update_degraded_mode(self):
+        """Enter degraded mode when HA is slow; leave after a run of healthy ticks."""
+        reason = ""
+        limits_ms = {
+            "ha": self.watchdog_latency_ms,
+            "device": self.watchdog_device_latency_ms,
+            "tick": self.watchdog_tick_s * 1000.0,
+        }
+        for op, hist in self._latency.items():
+            if len(hist) < WATCHDOG_MIN_SAMPLES:
+                continue  # one slow call on a rare operation is not a trend
+            if op in ("tick", "queue_wait"):
+                limit_ms = limits_ms["tick"]
+            elif op in DEVICE_LATENCY_OPS:
+                limit_ms = limits_ms["device"]
+            else:
+                limit_ms = limits_ms["ha"]
+            p95 = hist.percentile(0.95)
+            if p95 is not None and p95 > limit_ms:
+                reason = f"{op} p95={p95}ms"
+                break
+
+        if reason:
+            self._healthy_ticks = 0
+            if not self.degraded:
+                self.log(f"[WATCHDOG] degraded mode ON ({reason})", level="WARNING")
+            self.degraded = True
+            self._degraded_reason = reason
+        elif self.degraded:
+            self._healthy_ticks += 1
+            if self._healthy_ticks >= WATCHDOG_RECOVERY_TICKS:
+                self.degraded = False
+                self._degraded_reason = ""
+                self.log("[WATCHDOG] degraded mode OFF")
+
+    def _publish_watchdog(self):
+        latency = {
+            op: {"p50_ms": hist.percentile(0.5, exact=False), "p95_ms": hist.percentile(0.95, exact=False)}
+            for op, hist in sorted(self._latency.items())
+        }
+        self._publish(
+            WATCHDOG_SENSOR,
+            "degraded" if self.degraded else "ok",
+            {
+                "friendly_name": "Heat Orchestrator Watchdog",
+                "icon": "mdi:heart-pulse",
+                "reason": self._degraded_reason,
+                "latency": latency,
+                "stale_rooms": dict(self.stale_rooms),
+            },
+        )
+
+    # -----------------------------------------------------------------------
+    # Diagnostics
+    # -----------------------------------------------------------------------
+    def _note_room(self, room: str, **fields):
+        """Record values the current tick used for a room (for diagnostics)."""
+        self._tick_rooms.setdefault(room, {}).update(fields)
+
+    def _publish(self, entity: str, state, attributes: dict):
+        """Write a sensor only when its content changed since the last write."""
+        content = (state, attributes)
+        refresh = self._tick_counter % PUBLISH_REFRESH_TICKS == 0
+        if not refresh and self._published.get(entity) == content:
+            return
+        try:
+            self.set_state(entity, state=state, attributes=attributes)
+            self._published[entity] = content
+        except Exception as e:
+            self.log(f"[WARN] publish {entity}: {e}", level="WARNING")
+
+    def _update_diagnostics(self):
+        """Publish the tick's decision as a single attribute-rich sensor."""
+        decision = self._decision
+        state = decision["state"]
+        floor = decision["floor"] if state in (STATE_HEAT_GF, STATE_HEAT_FF) else "none"
+        selected = decision["rooms"] if floor != "none" else []
+
+        rooms = {}
+        for room in self.config.all_rooms:
+            noted = self._tick_rooms.get(room, {})
+            cooldown_until = self.room_cooldown_until.get(room)
+            target = self.setpoint_targets.get(room)
+            latency = self.actuation_latency.get(room)
+            score = noted.get("score")
+            rooms[room] = {
+                "t_cur": noted.get("t_cur"),
+                "t_user": noted.get("t_user"),
+                "demand": noted.get("demand", False),
+                "score": round(score, 1) if score is not None else None,
+                "selected": room in selected,
+                "cooldown_until": cooldown_until.isoformat() if cooldown_until else None,
+                "unmanaged": room in self.unmanaged_rooms,
+                "stale": room in self.stale_rooms,
+                "preheat_boost": self.preheat_boost.get(room, 0.0),
+                "confirmed": target.confirmed if target is not None else None,
+                "actuation_p95_ms": latency.percentile(0.95, exact=False) if latency is not None else None,
+            }
+
+        t_out = decision["t_out"]
+        self._publish(
+            DIAGNOSTICS_SENSOR,
+            state,
+            {
+                "friendly_name": "Heat Orchestrator",
+                "icon": "mdi:state-machine",
+                "active_floor": floor,
+                "active_rooms": selected,
+                "t_out": round(t_out, 1) if t_out is not None else None,
+                "rooms": rooms,
+            },
+        )
@@ -0,0 +1,7 @@
+"""
+Standalone runtime for Heat Orchestrator
+========================================
+Runs the unmodified ``HeatOrchestrator`` app without AppDaemon, directly on
+the Home Assistant WebSocket API (see ``runtime.py``). ``fake_ha.py`` is a
+minimal in-process Home Assistant used to exercise the runtime offline.
+"""
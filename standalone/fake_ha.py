@@ -0,0 +1,269 @@
+"""
+Fake Home Assistant for offline runs of the standalone runtime
+==============================================================
+Implements just enough of the HA WebSocket and REST APIs for ``runtime.py``:
+``auth``, ``subscribe_entities`` (compressed ``a``/``c``/``r`` events),
+``call_service`` with the domains the orchestrator uses, ``ping`` and
+``POST /api/states/<entity_id>``.
+
+Start a seeded house and point the runtime at it::
+
+    python -m standalone.fake_ha --port 8124
+    python -m standalone --url ws://127.0.0.1:8124/api/websocket --token fake-token
+
+Or use ``FakeHomeAssistant`` in-process::
+
+    fake = FakeHomeAssistant()
+    seed_house(fake)
+    url = await fake.start()
+    ...
+    fake.set_state("climate.sypialnia", "heat", current_temperature=18.5)
+    await fake.stop()
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import time
+
+from aiohttp import WSMsgType, web
+
+DEFAULT_TOKEN = "fake-token"
+
+
+class FakeHomeAssistant:
+    """In-memory HA state machine served over WebSocket and REST."""
+
+    def __init__(self, token: str = DEFAULT_TOKEN):
+        self.token = token
+        self.states: dict[str, dict] = {}  # entity_id → {"s", "a", "lc", "lu", "lr"}
+        self.service_calls: list[tuple[str, str, dict]] = []
+        self.forecast: list[dict] = []
+        self.failing_entities: set[str] = set()  # climate/set_temperature errors for these
+        self.hanging_services: set[str] = set()  # "domain/service" calls never answered
+        self.silent_entities: set[str] = set()  # climate/set_temperature accepted, never applied
+        self.button_actions: dict[str, callable] = {}  # input_button → side effect
+        self._subscribers: list[tuple[web.WebSocketResponse, int]] = []
+        self._runner: web.AppRunner | None = None
+
+        self.app = web.Application()
+        self.app.router.add_get("/api/websocket", self._handle_ws)
+        self.app.router.add_post("/api/states/{entity_id}", self._handle_post_state)
+
+    # --- Server lifecycle ---------------------------------------------------------
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving; return the WebSocket URL."""
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        return f"ws://{host}:{port}/api/websocket"
+
+    async def stop(self):
+        for ws, _ in list(self._subscribers):
+            await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    # --- State machine --------------------------------------------------------------
+    def set_state(self, entity_id: str, state, **attributes):
+        """Set state and merge attributes, pushing the diff to subscribers."""
+        now = time.time()
+        old = self.states.get(entity_id)
+        if old is None:
+            self.states[entity_id] = {
+                "s": str(state), "a": dict(attributes), "lc": now, "lu": now, "lr": now,
+            }
+            self._broadcast({"a": {entity_id: {**self.states[entity_id], "a": dict(attributes)}}})
+            return
+
+        added: dict = {}
+        if str(state) != old["s"]:
+            old["s"] = added["s"] = str(state)
+            old["lc"] = old["lu"] = added["lc"] = now
+        changed_attrs = {k: v for k, v in attributes.items() if old["a"].get(k) != v}
+        if changed_attrs:
+            old["a"].update(changed_attrs)
+            added["a"] = changed_attrs
+            old["lu"] = now
+            if "lc" not in added:
+                added["lu"] = now
+        if added:
+            old["lr"] = now
+            self._broadcast({"c": {entity_id: {"+": added}}})
+        else:
+            self.report_state(entity_id)
+
+    def report_state(self, entity_id: str):
+        """Re-report an unchanged state: only ``last_reported`` moves, as in HA."""
+        now = time.time()
+        self.states[entity_id]["lr"] = now
+        self._broadcast({"c": {entity_id: {"+": {"lr": now}}}})
+
+    def remove_state(self, entity_id: str):
+        if self.states.pop(entity_id, None) is not None:
+            self._broadcast({"r": [entity_id]})
+
+    def _broadcast(self, event: dict):
+        for ws, sub_id in list(self._subscribers):
+            if ws.closed:
+                self._subscribers.remove((ws, sub_id))
+                continue
+            asyncio.ensure_future(ws.send_json({"id": sub_id, "type": "event", "event": event}))
+
+    # --- Services ---------------------------------------------------------------------
+    def call_service(self, domain: str, service: str, data: dict):
+        """Apply a service call; return the service response (or None)."""
+        self.service_calls.append((domain, service, dict(data)))
+        entity_id = data.get("entity_id")
+        current = self.states.get(entity_id, {}).get("s") if entity_id else None
+
+        if domain == "input_number" and service == "set_value":
+            self.set_state(entity_id, str(float(data["value"])))
+        elif domain == "input_text" and service == "set_value":
+            self.set_state(entity_id, data["value"])
+        elif domain in ("input_boolean", "switch") and service in ("turn_on", "turn_off"):
+            self.set_state(entity_id, "on" if service == "turn_on" else "off")
+        elif domain == "input_datetime" and service == "set_datetime":
+            self.set_state(entity_id, data.get("datetime") or data.get("time"))
+        elif domain == "input_button" and service == "press":
+            self.set_state(entity_id, datetime.datetime.now(datetime.timezone.utc).isoformat())
+            action = self.button_actions.get(entity_id)
+            if action is not None:
+                action()
+        elif domain == "climate" and service == "set_temperature":
+            if entity_id in self.failing_entities:
+                raise RuntimeError(f"{entity_id} did not respond")
+            if entity_id in self.silent_entities:
+                return None
+            self.set_state(entity_id, current or "heat", temperature=float(data["temperature"]))
+        elif domain == "weather" and service == "get_forecasts":
+            return {entity_id: {"forecast": list(self.forecast)}}
+        return None
+
+    # --- Handlers ---------------------------------------------------------------------
+    async def _handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_json({"type": "auth_required", "ha_version": "fake"})
+        auth = await ws.receive_json()
+        if auth.get("type") != "auth" or auth.get("access_token") != self.token:
+            await ws.send_json({"type": "auth_invalid", "message": "Invalid access token"})
+            await ws.close()
+            return ws
+        await ws.send_json({"type": "auth_ok", "ha_version": "fake"})
+
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                break
+            await self._handle_command(ws, msg.json())
+
+        self._subscribers = [(s, i) for s, i in self._subscribers if s is not ws]
+        return ws
+
+    async def _handle_command(self, ws: web.WebSocketResponse, msg: dict):
+        msg_id = msg.get("id")
+        kind = msg.get("type")
+        if kind == "ping":
+            await ws.send_json({"id": msg_id, "type": "pong"})
+        elif kind == "subscribe_entities":
+            self._subscribers.append((ws, msg_id))
+            await ws.send_json({"id": msg_id, "type": "result", "success": True, "result": None})
+            await ws.send_json({"id": msg_id, "type": "event", "event": {"a": self.states}})
+        elif kind == "call_service":
+            if f"{msg['domain']}/{msg['service']}" in self.hanging_services:
+                return
+            try:
+                response = self.call_service(msg["domain"], msg["service"], msg.get("service_data", {}))
+            except Exception as e:
+                await ws.send_json({
+                    "id": msg_id, "type": "result", "success": False,
+                    "error": {"code": "home_assistant_error", "message": str(e)},
+                })
+                return
+            result = {"context": {"id": f"fake-{msg_id}"}}
+            if msg.get("return_response"):
+                result["response"] = response
+            await ws.send_json({"id": msg_id, "type": "result", "success": True, "result": result})
+        else:
+            await ws.send_json({
+                "id": msg_id, "type": "result", "success": False,
+                "error": {"code": "unknown_command", "message": f"Unknown command: {kind}"},
+            })
+
+    async def _handle_post_state(self, request: web.Request) -> web.Response:
+        if request.headers.get("Authorization") != f"Bearer {self.token}":
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        entity_id = request.match_info["entity_id"]
+        body = await request.json()
+        existing = self.states.get(entity_id)
+        if existing is not None:
+            # POST /api/states replaces the attributes wholesale
+            removed = [k for k in existing["a"] if k not in body.get("attributes", {})]
+            for key in removed:
+                del existing["a"][key]
+            if removed:
+                self._broadcast({"c": {entity_id: {"-": {"a": removed}}}})
+        self.set_state(entity_id, body.get("state"), **body.get("attributes", {}))
+        return web.json_response({"entity_id": entity_id, "state": str(body.get("state"))})
+
+
+def seed_house(fake: FakeHomeAssistant, room_temp: float = 19.0, outdoor_temp: float = 2.0):
+    """Populate every entity the orchestrator reads, with helper defaults.
+
+    The OFF window is placed 12–18 h from now, so a run heats at any hour.
+    """
+    from .runtime import load_app_module
+
+    ho = load_app_module()
+    for room in ho.ALL_ROOMS:
+        fake.set_state(f"{ho.CLIMATE_PREFIX}{room}", "heat", temperature=21.0, current_temperature=room_temp)
+        fake.set_state(f"{ho.USER_SP_PREFIX}{room}", "21.0")
+        fake.set_state(f"{ho.PRIORITY_PREFIX}{room}", "50.0")
+        fake.set_state(f"{ho.HEATING_PREFIX}{room}", "off")
+        fake.set_state(f"{ho.HEATING_MINUTES_PREFIX}{room}", "0.0")
+    fake.set_state(ho.PUMP_SWITCH, "off")
+    fake.set_state(ho.PUMP_OFF_BUTTON, "unknown")
+    fake.button_actions[ho.PUMP_OFF_BUTTON] = lambda: fake.set_state(ho.PUMP_SWITCH, "off")
+    fake.set_state(ho.WEATHER_ENTITY, "cloudy", temperature=outdoor_temp)
+    fake.forecast = [{"datetime": datetime.datetime.now(datetime.timezone.utc).isoformat(), "temperature": outdoor_temp}]
+    fake.set_state("input_text.heat_state", ho.STATE_OFF)
+    fake.set_state("input_number.pump_on_minutes_today", "0.0")
+    fake.set_state("input_number.pump_starts_today", "0.0")
+    now = datetime.datetime.now()
+    for entity, hours in (("off_window_start", 12), ("off_window_end", 18)):
+        at = now + datetime.timedelta(hours=hours)
+        fake.set_state(f"input_datetime.{entity}", at.strftime("%H:%M:%S"))
+    fake.set_state("input_datetime.day_reset_time", "00:00:00")
+    for entity in ("state_since", "last_pump_on", "last_pump_off"):
+        fake.set_state(f"input_datetime.{entity}", "unknown")
+
+
+async def _serve(host: str, port: int, token: str):
+    fake = FakeHomeAssistant(token)
+    seed_house(fake)
+    url = await fake.start(host, port)
+    print(f"fake Home Assistant on {url} (token: {token})", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fake.stop()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Serve a fake Home Assistant for offline runs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8124)
+    parser.add_argument("--token", default=DEFAULT_TOKEN)
+    opts = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(opts.host, opts.port, opts.token))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,494 @@
+"""
+Heat Orchestrator – standalone WebSocket runtime
+================================================
+Runs the unmodified ``HeatOrchestrator`` app directly on the Home Assistant
+WebSocket API instead of inside AppDaemon:
+
+- one authenticated WebSocket connection carries every service call,
+  multiplexed by message id,
+- ``subscribe_entities`` keeps a push-maintained local state mirror, so
+  ``get_state`` never leaves the process,
+- timers run on an asyncio loop; app callbacks execute one at a time on a
+  single worker thread.
+
+Usage::
+
+    python -m standalone --url ws://homeassistant.local:8123/api/websocket --token "$HA_TOKEN"
+
+Requires ``aiohttp``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import concurrent.futures
+import datetime
+import importlib
+import itertools
+import json
+import logging
+import os
+import sys
+import types
+from typing import Callable
+
+try:
+    import aiohttp
+except ImportError:  # optional dependency, only needed by this runtime
+    aiohttp = None
+
+APPS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "apps", "heat_orchestrator"
+)
+
+SERVICE_TIMEOUT = 30.0  # seconds a blocking call_service waits for HA
+RECONNECT_DELAY_MAX = 60.0  # seconds
+
+_LOGGER = logging.getLogger("heat_orchestrator")
+
+
+class HomeAssistantError(Exception):
+    """HA answered a request with success=false."""
+
+
+class AuthenticationError(Exception):
+    """The access token was rejected; reconnecting will not help."""
+
+
+def _iso(ts: float | None) -> str | None:
+    if ts is None:
+        return None
+    return datetime.datetime.fromtimestamp(ts, tz=datetime.timezone.utc).isoformat()
+
+
+def _seconds_until(at: datetime.time) -> float:
+    now = datetime.datetime.now()
+    target = datetime.datetime.combine(now.date(), at)
+    if target <= now:
+        target += datetime.timedelta(days=1)
+    return (target - now).total_seconds()
+
+
+def _parse_time(value) -> datetime.time:
+    if isinstance(value, datetime.time):
+        return value
+    return datetime.datetime.strptime(str(value), "%H:%M:%S").time()
+
+
+# ---------------------------------------------------------------------------
+# State mirror
+# ---------------------------------------------------------------------------
+class StateMirror:
+    """Local copy of HA states, maintained from ``subscribe_entities`` events.
+
+    Entries use AppDaemon's shape (``state``, ``attributes``, ``last_changed``,
+    ``last_updated``, ``last_reported``). Entries are replaced, never mutated, so readers on
+    other threads always see a consistent state.
+    """
+
+    def __init__(self):
+        self.states: dict[str, dict] = {}
+
+    def apply(self, event: dict) -> list[tuple[str, dict | None, dict | None]]:
+        """Apply one compressed event; return ``(entity_id, old, new)`` per change."""
+        changes = []
+        for entity_id, comp in event.get("a", {}).items():
+            old = self.states.get(entity_id)
+            new = {
+                "entity_id": entity_id,
+                "state": comp.get("s"),
+                "attributes": dict(comp.get("a", {})),
+                "last_changed": _iso(comp.get("lc")),
+                "last_updated": _iso(comp.get("lu", comp.get("lc"))),
+                "last_reported": _iso(comp.get("lr", comp.get("lu", comp.get("lc")))),
+            }
+            self.states[entity_id] = new
+            changes.append((entity_id, old, new))
+
+        for entity_id, diff in event.get("c", {}).items():
+            old = self.states.get(entity_id)
+            if old is None:
+                continue
+            new = {**old, "attributes": dict(old["attributes"])}
+            added = diff.get("+", {})
+            if "s" in added:
+                new["state"] = added["s"]
+            new["attributes"].update(added.get("a", {}))
+            for key in diff.get("-", {}).get("a", []):
+                new["attributes"].pop(key, None)
+            if "lc" in added:
+                new["last_changed"] = new["last_updated"] = new["last_reported"] = _iso(added["lc"])
+            if "lu" in added:
+                new["last_updated"] = new["last_reported"] = _iso(added["lu"])
+            if "lr" in added:
+                new["last_reported"] = _iso(added["lr"])
+            self.states[entity_id] = new
+            changes.append((entity_id, old, new))
+
+        for entity_id in event.get("r", []):
+            old = self.states.pop(entity_id, None)
+            if old is not None:
+                changes.append((entity_id, old, None))
+        return changes
+
+
+# ---------------------------------------------------------------------------
+# WebSocket connection
+# ---------------------------------------------------------------------------
+class HomeAssistantWS:
+    """One authenticated WebSocket connection shared by all requests."""
+
+    def __init__(self, url: str, token: str, session):
+        self.url = url
+        self._token = token
+        self._session = session
+        self._ws = None
+        self._reader: asyncio.Task | None = None
+        self._ids = itertools.count(1)
+        self._pending: dict[int, asyncio.Future] = {}
+        self._subscriptions: dict[int, Callable[[dict], None]] = {}
+
+    async def connect(self):
+        self._ws = await self._session.ws_connect(self.url, heartbeat=30)
+        await self._ws.receive_json()  # auth_required
+        await self._ws.send_json({"type": "auth", "access_token": self._token})
+        reply = await self._ws.receive_json()
+        if reply.get("type") != "auth_ok":
+            await self._ws.close()
+            raise AuthenticationError(reply.get("message", reply.get("type")))
+        self._reader = asyncio.create_task(self._read_loop())
+
+    async def wait_closed(self):
+        if self._reader is not None:
+            await self._reader
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+        await self.wait_closed()
+
+    async def request(self, payload: dict):
+        """Send one command and wait for its result."""
+        if self._ws is None or self._ws.closed:
+            raise ConnectionError("not connected to Home Assistant")
+        msg_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[msg_id] = future
+        try:
+            await self._ws.send_json({**payload, "id": msg_id})
+            # Bounded here too: the caller's run_sync timeout does not
+            # cancel this coroutine, and an unanswered id must not leak.
+            return await asyncio.wait_for(future, SERVICE_TIMEOUT)
+        finally:
+            self._pending.pop(msg_id, None)
+
+    async def subscribe_entities(self, handler: Callable[[dict], None]):
+        msg_id = next(self._ids)
+        self._subscriptions[msg_id] = handler
+        future = asyncio.get_running_loop().create_future()
+        self._pending[msg_id] = future
+        await self._ws.send_json({"id": msg_id, "type": "subscribe_entities"})
+        await future
+
+    async def _read_loop(self):
+        try:
+            async for msg in self._ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    break
+                payload = json.loads(msg.data)
+                # HA may coalesce several messages into one JSON array
+                for item in payload if isinstance(payload, list) else [payload]:
+                    self._dispatch(item)
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("connection to Home Assistant lost"))
+            self._pending.clear()
+
+    def _dispatch(self, msg: dict):
+        if msg.get("type") == "event":
+            handler = self._subscriptions.get(msg.get("id"))
+            if handler is not None:
+                handler(msg.get("event", {}))
+            return
+        future = self._pending.pop(msg.get("id"), None)
+        if future is None or future.done():
+            return
+        if msg.get("success", True):
+            future.set_result(msg.get("result"))
+        else:
+            error = msg.get("error", {})
+            future.set_exception(HomeAssistantError(error.get("message", "request failed")))
+
+
+# ---------------------------------------------------------------------------
+# AppDaemon API subset
+# ---------------------------------------------------------------------------
+class StandaloneHass:
+    """The part of AppDaemon's ``hassapi.Hass`` API used by HeatOrchestrator.
+
+    Installed as ``hassapi.Hass`` before the app module is imported, so the
+    app runs unchanged. All methods are called from the worker thread.
+    """
+
+    def __init__(self, runtime: "Runtime", args: dict | None = None):
+        self._runtime = runtime
+        self.name = "heat_orchestrator"
+        self.args = args or {}
+
+    def log(self, msg: str, level: str = "INFO", **kwargs):
+        _LOGGER.log(logging.getLevelName(level), msg)
+
+    def datetime(self, aware: bool = False) -> datetime.datetime:
+        if aware:
+            return datetime.datetime.now().astimezone()
+        return datetime.datetime.now()
+
+    # --- State ---------------------------------------------------------------
+    def get_state(self, entity_id: str | None = None, attribute: str | None = None, default=None, **kwargs):
+        states = self._runtime.mirror.states
+        if entity_id is None:
+            return dict(states)
+        state = states.get(entity_id)
+        if state is None:
+            return default
+        if attribute == "all":
+            return state
+        if attribute is not None:
+            return state["attributes"].get(attribute, default)
+        return state["state"]
+
+    def entity_exists(self, entity_id: str, **kwargs) -> bool:
+        return entity_id in self._runtime.mirror.states
+
+    def set_state(self, entity_id: str, state=None, attributes: dict | None = None, **kwargs):
+        return self._runtime.run_sync(self._runtime.post_state(entity_id, state, attributes or {}))
+
+    def call_service(self, service: str, **kwargs):
+        domain, name = service.split("/", 1)
+        return_result = kwargs.pop("return_result", False)
+        kwargs.pop("namespace", None)
+        payload = {"type": "call_service", "domain": domain, "service": name, "service_data": kwargs}
+        if return_result:
+            payload["return_response"] = True
+        result = self._runtime.run_sync(self._runtime.request(payload))
+        if return_result:
+            return (result or {}).get("response")
+        return result
+
+    # --- Listeners -----------------------------------------------------------
+    def listen_state(self, callback, entity_id: str | None = None, attribute: str | None = None, **kwargs):
+        return self._runtime.add_listener(callback, entity_id, attribute, kwargs)
+
+    def cancel_listen_state(self, handle, **kwargs):
+        self._runtime.remove_listener(handle)
+
+    # --- Scheduler -----------------------------------------------------------
+    def run_in(self, callback, delay: float, **kwargs):
+        return self._runtime.schedule(callback, lambda: float(delay), repeat=False, kwargs=kwargs)
+
+    def run_every(self, callback, start, interval: float, **kwargs):
+        if start == "now":
+            first = 0.0
+        elif isinstance(start, datetime.datetime):
+            first = max(0.0, (start - datetime.datetime.now()).total_seconds())
+        else:
+            first = float(interval)
+        delays = iter(itertools.chain([first], itertools.repeat(float(interval))))
+        return self._runtime.schedule(callback, lambda: next(delays), repeat=True, kwargs=kwargs)
+
+    def run_daily(self, callback, start, **kwargs):
+        at = _parse_time(start)
+        return self._runtime.schedule(callback, lambda: _seconds_until(at), repeat=True, kwargs=kwargs)
+
+    def cancel_timer(self, handle, **kwargs):
+        self._runtime.cancel(handle)
+
+
+# ---------------------------------------------------------------------------
+# Runtime
+# ---------------------------------------------------------------------------
+def load_app_module():
+    """Import the app module with ``hassapi`` resolved to StandaloneHass."""
+    shim = types.ModuleType("hassapi")
+    shim.Hass = StandaloneHass
+    sys.modules["hassapi"] = shim
+    if APPS_DIR not in sys.path:
+        sys.path.insert(0, APPS_DIR)
+    return importlib.import_module("heat_orchestrator")
+
+
+class Runtime:
+    """Owns the connection, the state mirror, timers and the app instance."""
+
+    def __init__(self, url: str, token: str, args: dict | None = None):
+        if aiohttp is None:
+            raise RuntimeError("the standalone runtime requires aiohttp (pip install aiohttp)")
+        self.url = url
+        self.token = token
+        self.http_url = url.replace("ws", "http", 1).rsplit("/api/websocket", 1)[0]
+        self.args = args or {}
+        self.mirror = StateMirror()
+        self.app = None
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self._ws: HomeAssistantWS | None = None
+        self._session = None
+        self._synced = asyncio.Event()
+        self._worker = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="heat_orchestrator"
+        )
+        self._handles = itertools.count(1)
+        self._timers: dict[int, asyncio.TimerHandle] = {}
+        self._listeners: dict[int, tuple] = {}
+
+    # --- Called from the worker thread ----------------------------------------
+    def run_sync(self, coro, timeout: float = SERVICE_TIMEOUT):
+        """Run a coroutine on the loop and block the calling thread for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    async def request(self, payload: dict):
+        if self._ws is None:
+            raise ConnectionError("not connected to Home Assistant")
+        return await self._ws.request(payload)
+
+    async def post_state(self, entity_id: str, state, attributes: dict):
+        async with self._session.post(
+            f"{self.http_url}/api/states/{entity_id}",
+            json={"state": state, "attributes": attributes},
+            headers={"Authorization": f"Bearer {self.token}"},
+        ) as resp:
+            resp.raise_for_status()
+            return await resp.json()
+
+    def add_listener(self, callback, entity_id, attribute, kwargs) -> int:
+        handle = next(self._handles)
+        self._listeners[handle] = (callback, entity_id, attribute, kwargs)
+        return handle
+
+    def remove_listener(self, handle):
+        self._listeners.pop(handle, None)
+
+    def schedule(self, callback, next_delay: Callable[[], float], repeat: bool, kwargs: dict) -> int:
+        handle = next(self._handles)
+        self.loop.call_soon_threadsafe(self._arm, handle, callback, next_delay, repeat, kwargs)
+        return handle
+
+    def cancel(self, handle):
+        self.loop.call_soon_threadsafe(self._disarm, handle)
+
+    # --- Loop thread ------------------------------------------------------------
+    def _arm(self, handle, callback, next_delay, repeat, kwargs):
+        def fire():
+            if repeat:
+                self._timers[handle] = self.loop.call_later(max(0.0, next_delay()), fire)
+            else:
+                self._timers.pop(handle, None)
+            self.dispatch(callback, **kwargs)
+
+        self._timers[handle] = self.loop.call_later(max(0.0, next_delay()), fire)
+
+    def _disarm(self, handle):
+        timer = self._timers.pop(handle, None)
+        if timer is not None:
+            timer.cancel()
+
+    def dispatch(self, callback, *args, **kwargs):
+        """Queue an app callback on the single worker thread."""
+        self._worker.submit(self._invoke, callback, args, kwargs)
+
+    @staticmethod
+    def _invoke(callback, args, kwargs):
+        try:
+            callback(*args, **kwargs)
+        except Exception:
+            _LOGGER.exception("callback %s failed", getattr(callback, "__name__", callback))
+
+    def _on_entities(self, event: dict):
+        for entity_id, old, new in self.mirror.apply(event):
+            for callback, listen_entity, attribute, kwargs in list(self._listeners.values()):
+                if listen_entity is not None and listen_entity != entity_id:
+                    continue
+                if attribute == "all":
+                    old_val, new_val = old, new
+                elif attribute is not None:
+                    old_val = old["attributes"].get(attribute) if old else None
+                    new_val = new["attributes"].get(attribute) if new else None
+                else:
+                    old_val = old["state"] if old else None
+                    new_val = new["state"] if new else None
+                if old_val != new_val:
+                    self.dispatch(callback, entity_id, attribute or "state", old_val, new_val, **kwargs)
+        self._synced.set()
+
+    async def _connect(self):
+        ws = HomeAssistantWS(self.url, self.token, self._session)
+        await ws.connect()
+        self._ws = ws
+        self._synced.clear()
+        await ws.subscribe_entities(self._on_entities)
+        await self._synced.wait()
+        return ws
+
+    def _start_app(self):
+        module = load_app_module()
+        self.app = module.HeatOrchestrator(self, self.args)
+        self.app.initialize()
+
+    def _stop_app(self):
+        terminate = getattr(self.app, "terminate", None)
+        if terminate is not None:
+            terminate()
+
+    async def run(self):
+        """Connect, start the app, and keep the connection alive until cancelled."""
+        self.loop = asyncio.get_running_loop()
+        delay = 1.0
+        async with aiohttp.ClientSession() as session:
+            self._session = session
+            try:
+                while True:
+                    try:
+                        ws = await self._connect()
+                        delay = 1.0
+                        _LOGGER.info("connected to %s (%d entities)", self.url, len(self.mirror.states))
+                        if self.app is None:
+                            await self.loop.run_in_executor(self._worker, self._start_app)
+                        await ws.wait_closed()
+                        _LOGGER.warning("connection to Home Assistant closed")
+                    except (aiohttp.ClientError, ConnectionError, OSError) as e:
+                        _LOGGER.warning("connection failed: %s", e)
+                    self._ws = None
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, RECONNECT_DELAY_MAX)
+            finally:
+                if self.app is not None:
+                    await self.loop.run_in_executor(self._worker, self._stop_app)
+                for timer in self._timers.values():
+                    timer.cancel()
+                self._timers.clear()
+                if self._ws is not None:
+                    await self._ws.close()
+                self._worker.shutdown(wait=False)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Run Heat Orchestrator on the HA WebSocket API")
+    parser.add_argument("--url", default=os.environ.get("HA_URL"), help="ws://host:8123/api/websocket (or $HA_URL)")
+    parser.add_argument("--token", default=os.environ.get("HA_TOKEN"), help="long-lived access token (or $HA_TOKEN)")
+    parser.add_argument("--args", help="JSON file with app args (same keys as apps.yaml)")
+    parser.add_argument("--log-level", default="INFO")
+    opts = parser.parse_args(argv)
+    if not opts.url or not opts.token:
+        parser.error("--url and --token are required")
+
+    logging.basicConfig(level=opts.log_level, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    args = {}
+    if opts.args:
+        with open(opts.args) as f:
+            args = json.load(f)
+
+    try:
+        asyncio.run(Runtime(opts.url, opts.token, args).run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,141 @@
+"""Shared fixture: the app on the standalone runtime, against FakeHomeAssistant.
+
+The runtime and the fake run on an event loop in a background thread. Tests
+stay on the main thread and reach the app through ``House.call``, which runs
+a function on the app's single writer thread, like any other callback.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+TIMEOUT = 10.0  # seconds any single wait in the harness may take
+
+# Only the initial tick runs on its own within a test's runtime; tests drive
+# further ticks, and commit setpoint bursts, themselves.
+HOUSE_ARGS = {"tick_interval": 60, "user_sp_settle_s": 3600}
+
+
+class House:
+    """A seeded FakeHomeAssistant with the app running on the standalone runtime."""
+
+    def __init__(self, args: dict, room_temp: float):
+        from standalone.fake_ha import FakeHomeAssistant, seed_house
+
+        self.fake = FakeHomeAssistant()
+        seed_house(self.fake, room_temp=room_temp)
+        self.args = args
+        self.rt = None
+        self._task = None
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    @property
+    def app(self):
+        return self.rt.app
+
+    def start(self):
+        from standalone.runtime import Runtime
+
+        self._thread.start()
+        url = self.run(self.fake.start())
+        self.rt = Runtime(url, self.fake.token, self.args)
+        self._task = self.run(self._spawn(self.rt.run()))
+        self.wait_for(lambda: self.app is not None and self.app._writer._thread.is_alive())
+        self.sync()
+
+    def stop(self):
+        if self.loop.is_closed():
+            return
+        if self._task is not None:
+            self.run(self._shutdown())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(TIMEOUT)
+        self.loop.close()
+
+    async def _spawn(self, coro):
+        return asyncio.create_task(coro)
+
+    async def _shutdown(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        await self.fake.stop()
+
+    # --- Driving the house ------------------------------------------------------
+    def run(self, coro):
+        """Run a coroutine on the loop thread and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(TIMEOUT)
+
+    def call(self, fn, *args, **kwargs):
+        """Run ``fn`` on the app's writer thread and return its result."""
+        done = concurrent.futures.Future()
+
+        def invoke():
+            try:
+                done.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                done.set_exception(e)
+
+        self.app._post(invoke)
+        return done.result(TIMEOUT)
+
+    def sync(self):
+        """Wait until every state event sent so far has been handled by the app."""
+        # A reply is read after every event the fake pushed before it
+        self.run(self.rt.request({"type": "ping"}))
+        self.rt._worker.submit(lambda: None).result(TIMEOUT)  # listeners → writer
+        self.call(lambda: None)
+
+    def set_state(self, entity_id: str, state, **attributes):
+        """Change an entity in the fake and let the app see the event."""
+
+        async def apply():
+            self.fake.set_state(entity_id, state, **attributes)
+
+        self.run(apply())
+        self.sync()
+
+    def tick(self):
+        self.call(self.app._run_tick)
+        self.sync()
+
+    def wait_for(self, predicate, timeout: float = TIMEOUT):
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() > deadline:
+                raise AssertionError("condition not met in time")
+            time.sleep(0.02)
+
+    def calls(self, domain: str, service: str) -> list[dict]:
+        return [data for d, s, data in self.fake.service_calls if (d, s) == (domain, service)]
+
+
+@pytest.fixture
+def house_factory(tmp_path):
+    """Start a house with extra app args and an optional room temperature."""
+    pytest.importorskip("aiohttp")
+    houses = []
+
+    def start(room_temp: float = 19.0, **args):
+        house = House(
+            {**HOUSE_ARGS, "energy_store": str(tmp_path / "energy_ledger.json"), **args},
+            room_temp,
+        )
+        houses.append(house)
+        house.start()
+        return house
+
+    yield start
+    for house in houses:
+        house.stop()
+
+
+@pytest.fixture
+def house(house_factory):
+    return house_factory()
@@ -0,0 +1,84 @@
+"""Energy ledger rollover and the per-interval pump energy."""
+
+import datetime
+import json
+
+from standalone.runtime import load_app_module
+
+ho = load_app_module()
+
+DAY = datetime.date(2026, 10, 30)
+T0 = datetime.datetime(2026, 10, 30, 12, 0)
+METER = "sensor.heat_pump"
+
+
+def test_ledger_rolls_day_and_month(tmp_path):
+    ledger = ho.EnergyLedger(str(tmp_path / "ledger.json"))
+
+    ledger.add(DAY, 3.0, {"salon_2": 2.0, "sypialnia": 1.0}, ["salon_2", "sypialnia"], 1.0)
+    assert ledger.kwh_today == {"salon_2": 2.0, "sypialnia": 1.0}
+    assert ledger.min_today == {"salon_2": 1.0, "sypialnia": 1.0}
+
+    ledger.add(DAY + datetime.timedelta(days=1), 1.0, {"salon_2": 1.0}, ["salon_2"], 1.0)
+    assert ledger.day == "2026-10-31"
+    assert ledger.kwh_today == {"salon_2": 1.0}
+    assert ledger.kwh_month == {"salon_2": 3.0, "sypialnia": 1.0}
+    assert ledger.min_month == {"salon_2": 2.0, "sypialnia": 1.0}
+
+    ledger.add(DAY + datetime.timedelta(days=2), 0.0, {}, [], 1.0)
+    assert ledger.month == "2026-11"
+    assert ledger.kwh_month == {} and ledger.min_month == {}
+
+
+def test_ledger_saves_only_changes(tmp_path):
+    path = tmp_path / "ledger.json"
+    ledger = ho.EnergyLedger(str(path))
+    ledger.add(DAY, 0.5, {ho.EnergyLedger.DHW: 1.0}, [], 1.0)
+    ledger.save()
+    assert json.loads(path.read_text())["kwh_today"] == {ho.EnergyLedger.DHW: 0.5}
+
+    ledger.add(DAY, 0.0, {}, [], 1.0)
+    assert not ledger.dirty
+
+    reloaded = ho.EnergyLedger(str(path))
+    assert (reloaded.day, reloaded.kwh_month) == ("2026-10-30", {ho.EnergyLedger.DHW: 0.5})
+
+
+def _interval(house, at):
+    return house.call(house.app._interval_kwh, at)
+
+
+def _meter_house(house_factory, value, unit):
+    house = house_factory(energy_sensor=METER)
+    house.set_state(METER, value, unit_of_measurement=unit)
+
+    def forget():
+        house.app._energy_sample = None
+
+    house.call(forget)
+    return house
+
+
+def test_power_sensor_is_integrated(house_factory):
+    house = _meter_house(house_factory, "2000", "W")
+
+    assert _interval(house, T0) == 0.0  # first sample only anchors
+    house.set_state(METER, "1000", unit_of_measurement="W")
+    assert abs(_interval(house, T0 + datetime.timedelta(minutes=1)) - 1.5 / 60) < 1e-9
+
+    # Gaps over two tick intervals are not integrated
+    assert _interval(house, T0 + datetime.timedelta(minutes=4)) == 0.0
+
+
+def test_energy_meter_delta_and_reset(house_factory):
+    house = _meter_house(house_factory, "100.0", "kWh")
+
+    _interval(house, T0)
+    house.set_state(METER, "100.4", unit_of_measurement="kWh")
+    assert abs(_interval(house, T0 + datetime.timedelta(minutes=1)) - 0.4) < 1e-9
+    house.set_state(METER, "0.1", unit_of_measurement="kWh")  # meter reset
+    assert abs(_interval(house, T0 + datetime.timedelta(minutes=2)) - 0.1) < 1e-9
+
+    house.set_state(METER, "unavailable")
+    assert _interval(house, T0 + datetime.timedelta(minutes=3)) == 0.0
+    assert house.app._energy_sample is None
@@ -0,0 +1,138 @@
+"""Actuation reconciler, retry queue and per-room circuit breaker."""
+
+import datetime
+
+from standalone.runtime import load_app_module
+
+ho = load_app_module()
+
+
+def _sends(house, room):
+    return [
+        data["temperature"]
+        for data in house.calls("climate", "set_temperature")
+        if data["entity_id"] == f"climate.{room}"
+    ]
+
+
+def _age_send(house, room, seconds):
+    """Pretend the room's last setpoint send happened ``seconds`` earlier."""
+
+    def age():
+        house.app.setpoint_targets[room].sent_at -= seconds
+
+    house.call(age)
+
+
+def _expire_breaker(house, room):
+    def expire():
+        house.app.unmanaged_rooms[room] -= datetime.timedelta(minutes=ho.UNMANAGED_TIMEOUT_MIN)
+
+    house.call(expire)
+
+
+def _heated_room(house):
+    room = house.app._decision["rooms"][0]
+    house.set_state(f"{ho.USER_SP_PREFIX}{room}", "23.0")
+    return room
+
+
+def test_unreported_sends_back_off_then_open_breaker(house_factory):
+    house = house_factory(room_temp=17.0, actuation_confirm_timeout_s=60)
+    room = _heated_room(house)
+    house.fake.silent_entities.add(f"climate.{room}")
+
+    house.tick()
+    assert _sends(house, room) == [23.0]
+
+    house.tick()  # within the timeout: nothing new
+    _age_send(house, room, 61)
+    house.tick()
+    assert _sends(house, room) == [23.0, 23.0]
+
+    _age_send(house, room, 61)  # the second wait is twice as long
+    house.tick()
+    assert len(_sends(house, room)) == 2
+    _age_send(house, room, 60)
+    house.tick()
+    assert len(_sends(house, room)) == 3
+
+    _age_send(house, room, 4 * 60 + 1)
+    house.tick()
+    assert len(_sends(house, room)) == 3
+    assert room in house.app.unmanaged_rooms
+    assert house.app.actuation_failures.get(room) is None
+
+    # Half-open: the probe lands and is reported back, closing the breaker
+    house.fake.silent_entities.clear()
+    _expire_breaker(house, room)
+    house.tick()
+    assert _sends(house, room)[-1] == 23.0
+    assert len(_sends(house, room)) == 4
+    assert room not in house.app.unmanaged_rooms
+    assert house.app.setpoint_targets[room].confirmed
+    assert room not in house.app.unconfirmed_sends
+
+
+def test_send_is_confirmed_by_the_report(house_factory):
+    house = house_factory(room_temp=17.0)
+    room = _heated_room(house)
+
+    house.tick()
+
+    assert _sends(house, room) == [23.0]
+    target = house.app.setpoint_targets[room]
+    assert target.confirmed and target.heating
+    assert house.fake.states[f"{ho.HEATING_PREFIX}{room}"]["s"] == "on"
+    assert len(house.app.actuation_latency[room]) == 1
+    house.tick()
+    assert _sends(house, room) == [23.0]
+
+
+def test_drift_is_reissued(house_factory):
+    house = house_factory(room_temp=17.0)
+    room = _heated_room(house)
+    house.tick()
+
+    # The valve reverts while our own change is still guarded, so it is
+    # not taken for a user change
+    def guard():
+        house.app.automation_guard[room] = True
+
+    house.call(guard)
+    house.set_state(f"climate.{room}", "heat", temperature=19.0)
+    assert house.app._pending_user_sp == {}
+    house.tick()
+
+    assert _sends(house, room) == [23.0, 23.0]
+    assert house.fake.states[f"climate.{room}"]["a"]["temperature"] == 23.0
+    assert house.app.setpoint_targets[room].confirmed
+
+
+def test_failed_calls_trip_breaker_then_probe(house_factory):
+    house = house_factory(room_temp=17.0)
+    room = _heated_room(house)
+    house.fake.failing_entities.add(f"climate.{room}")
+
+    house.tick()
+    assert room in house.app.pending_actuations
+    for _ in range(ho.BREAKER_FAILURE_THRESHOLD - 1):
+        house.call(house.app._run_retry_actuation, room=room)
+    assert house.app.actuation_failures[room] == ho.BREAKER_FAILURE_THRESHOLD
+    assert room in house.app.unmanaged_rooms
+    assert room not in house.app.pending_actuations
+    attempts = len(_sends(house, room))
+    assert attempts == ho.BREAKER_FAILURE_THRESHOLD
+
+    house.tick()  # open: the room is left alone
+    assert len(_sends(house, room)) == attempts
+    assert room not in house.app._decision["rooms"]
+
+    house.fake.failing_entities.clear()
+    _expire_breaker(house, room)
+    house.tick()
+
+    assert _sends(house, room)[-1] == 23.0
+    assert room not in house.app.unmanaged_rooms
+    assert room not in house.app.actuation_failures
+    assert house.app.setpoint_targets[room].confirmed
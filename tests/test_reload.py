@@ -0,0 +1,68 @@
+"""Hot reload from the optional config file."""
+
+import json
+import logging
+import os
+
+from standalone.runtime import load_app_module
+
+ho = load_app_module()
+
+ROOM = "salon_2"
+
+
+def _house(house_factory, tmp_path, **config):
+    path = tmp_path / "rooms.json"
+    path.write_text(json.dumps({"gf_rooms": ho.GF_ROOMS, "ff_rooms": ho.FF_ROOMS, **config}))
+    return house_factory(room_temp=17.0, config_file=str(path)), path
+
+
+def _rewrite(path, **config):
+    data = {**json.loads(path.read_text()), **config}
+    path.write_text(json.dumps(data))
+    mtime = path.stat().st_mtime + 10  # a new mtime even on coarse filesystems
+    os.utime(path, (mtime, mtime))
+
+
+def test_removed_room_is_closed_despite_open_breaker(house_factory, tmp_path):
+    house, path = _house(house_factory, tmp_path)
+
+    def trip():
+        house.app.unmanaged_rooms[ROOM] = house.app.datetime()
+        house.app.cooling_k[ROOM] = 0.1
+
+    house.call(trip)
+    _rewrite(path, gf_rooms=[r for r in ho.GF_ROOMS if r != ROOM])
+    house.call(house.app._reload_config, "test")
+    house.sync()
+
+    off = house.app.room_off_setpoint
+    assert house.fake.states[f"climate.{ROOM}"]["a"]["temperature"] == off
+    assert house.fake.states[f"{ho.HEATING_PREFIX}{ROOM}"]["s"] == "off"
+    assert ROOM not in house.app.unmanaged_rooms
+    assert ROOM not in house.app.cooling_k
+
+
+def test_removed_room_left_open_is_logged(house_factory, tmp_path, caplog):
+    house, path = _house(house_factory, tmp_path)
+    house.fake.failing_entities.add(f"climate.{ROOM}")
+
+    _rewrite(path, gf_rooms=[r for r in ho.GF_ROOMS if r != ROOM])
+    with caplog.at_level(logging.WARNING, logger="heat_orchestrator"):
+        house.call(house.app._reload_config, "test")
+
+    assert f"{ROOM} removed, but its valve could not be closed" in caplog.text
+    assert ROOM not in house.app.pending_actuations
+
+
+def test_reload_tick_credits_the_old_interval(house_factory, tmp_path):
+    house, path = _house(house_factory, tmp_path)
+    house.tick()  # first tick with the heating flags confirmed on
+    room = house.app._decision["rooms"][0]
+    before = house.call(house.app._get_heating_minutes, room)
+
+    _rewrite(path, tick_interval=120)
+    house.tick()
+
+    assert house.app.config.tick_interval == 120
+    assert house.call(house.app._get_heating_minutes, room) == before + 1.0
@@ -0,0 +1,48 @@
+"""Smoke tests: the standalone runtime drives the app against FakeHomeAssistant."""
+
+import pytest
+
+from standalone import runtime
+
+
+def test_cold_house_starts_pump(house_factory, tmp_path):
+    house = house_factory(room_temp=17.0)
+
+    house.wait_for(lambda: house.calls("switch", "turn_on"))
+
+    assert house.calls("climate", "set_temperature")
+    assert house.fake.states["switch.sonoff_10017fadeb"]["s"] == "on"
+    house.call(house.app._save_energy)
+    assert (tmp_path / "energy_ledger.json").exists()
+
+
+def test_unanswered_call_is_dropped_after_timeout(house, monkeypatch):
+    monkeypatch.setattr(runtime, "SERVICE_TIMEOUT", 0.2)
+    house.fake.hanging_services.add("climate/set_temperature")
+
+    with pytest.raises(TimeoutError):
+        house.call(
+            house.app.call_service,
+            "climate/set_temperature",
+            entity_id="climate.salon_2",
+            temperature=22.0,
+        )
+
+    assert house.rt._ws._pending == {}
+    house.sync()  # the connection still answers
+
+
+def test_mirror_tracks_last_reported():
+    mirror = runtime.StateMirror()
+    mirror.apply({"a": {"climate.salon_2": {"s": "heat", "a": {}, "lc": 100.0}}})
+    assert mirror.states["climate.salon_2"]["last_reported"] == runtime._iso(100.0)
+
+    mirror.apply({"c": {"climate.salon_2": {"+": {"lr": 200.0}}}})
+    state = mirror.states["climate.salon_2"]
+    assert state["last_updated"] == runtime._iso(100.0)
+    assert state["last_reported"] == runtime._iso(200.0)
+
+    mirror.apply({"c": {"climate.salon_2": {"+": {"a": {"temperature": 22.0}, "lu": 300.0}}}})
+    assert mirror.states["climate.salon_2"]["last_reported"] == runtime._iso(300.0)
+    mirror.apply({"c": {"climate.salon_2": {"+": {"s": "off", "lc": 400.0}}}})
+    assert mirror.states["climate.salon_2"]["last_reported"] == runtime._iso(400.0)
@@ -0,0 +1,81 @@
+"""User setpoint bursts on a thermostat are coalesced into one user_sp commit."""
+
+from standalone.runtime import load_app_module
+
+USER_SP_PREFIX = load_app_module().USER_SP_PREFIX
+
+
+def _commit(house, room):
+    """Commit the room's burst now instead of after the settle period."""
+
+    def commit():
+        house.app._user_sp_settle = 0
+        house.app._run_commit_user_sp(room=room)
+
+    house.call(commit)
+    house.sync()
+
+
+def _drag(house, room, *values):
+    for value in values:
+        house.set_state(f"climate.{room}", "heat", temperature=value)
+
+
+def test_burst_commits_last_value_once(house_factory):
+    house = house_factory(room_temp=17.0)
+    room = house.app._decision["rooms"][0]
+    sends = len(house.calls("climate", "set_temperature"))
+
+    _drag(house, room, 21.5, 22.0, 22.5, 23.0)
+    assert house.fake.states[f"{USER_SP_PREFIX}{room}"]["s"] == "21.0"
+    house.tick()  # a tick inside the settle window must not revert the dial
+    assert len(house.calls("climate", "set_temperature")) == sends
+
+    _commit(house, room)
+
+    assert house.fake.states[f"{USER_SP_PREFIX}{room}"]["s"] == "23.0"
+    assert len(house.calls("input_number", "set_value")) >= 1
+    assert house.app._pending_user_sp == {}
+
+
+def test_drag_ending_on_target_keeps_the_target(house_factory):
+    house = house_factory(room_temp=17.0)
+    room = house.app._decision["rooms"][0]
+    assert house.app.setpoint_targets[room].temperature == 21.0
+    sends = len(house.calls("climate", "set_temperature"))
+
+    _drag(house, room, 21.5, 22.0, 21.5, 21.0)
+    _commit(house, room)
+    house.tick()
+
+    assert house.fake.states[f"{USER_SP_PREFIX}{room}"]["s"] == "21.0"
+    assert house.fake.states[f"climate.{room}"]["a"]["temperature"] == 21.0
+    assert len(house.calls("climate", "set_temperature")) == sends
+    assert house.app._pending_user_sp == {}
+
+
+def test_commit_pushes_new_target_to_heating_room(house_factory):
+    house = house_factory(room_temp=17.0)
+    room = house.app._decision["rooms"][0]
+
+    _drag(house, room, 21.5, 22.0)
+    house.set_state(f"climate.{room}", "heat", temperature=24.5)
+    _commit(house, room)
+
+    # The commit re-evaluates the room: the thermostat already shows 24.5,
+    # so it is confirmed without a send
+    assert house.fake.states[f"{USER_SP_PREFIX}{room}"]["s"] == "24.5"
+    assert house.app.setpoint_targets[room].temperature == 24.5
+    assert house.app.setpoint_targets[room].confirmed
+
+
+def test_commit_leaves_other_rooms_to_the_tick(house_factory):
+    house = house_factory(room_temp=17.0, user_sp_reevaluate=False)
+    room = house.app._decision["rooms"][0]
+
+    _drag(house, room, 22.0)
+    _commit(house, room)
+    assert house.app.setpoint_targets[room].temperature == 21.0
+
+    house.tick()
+    assert house.app.setpoint_targets[room].temperature == 22.0
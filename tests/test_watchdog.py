@@ -0,0 +1,36 @@
+"""Watchdog: stale thermostats are excluded from demand."""
+
+import time
+
+ROOM = "salon_2"
+ENTITY = f"climate.{ROOM}"
+
+
+def _last_change(house, seconds_ago):
+    """Move the thermostat's last change (and report) into the past."""
+
+    async def backdate():
+        state = house.fake.states[ENTITY]
+        state["lc"] = state["lu"] = state["lr"] = time.time() - seconds_ago
+        house.rt.mirror.apply({"a": {ENTITY: state}})
+
+    house.run(backdate())
+
+
+def test_unchanged_but_reporting_thermostat_is_not_stale(house):
+    _last_change(house, 4 * 3600)
+    house.tick()
+    assert ROOM in house.app.stale_rooms
+
+    # Same state again: HA moves last_reported only
+    _last_change(house, 4 * 3600)
+    last_updated = house.rt.mirror.states[ENTITY]["last_updated"]
+
+    async def report():
+        house.fake.report_state(ENTITY)
+
+    house.run(report())
+    house.sync()
+    assert house.rt.mirror.states[ENTITY]["last_updated"] == last_updated
+    house.tick()
+    assert ROOM not in house.app.stale_rooms
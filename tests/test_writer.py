@@ -0,0 +1,44 @@
+"""Single-writer event loop and shutdown."""
+
+import threading
+
+from standalone.runtime import load_app_module
+
+ho = load_app_module()
+
+
+def test_runs_posted_events_in_order_on_one_thread():
+    ran = []
+    writer = ho.SingleWriter(on_error=lambda fn, exc: ran.append(exc))
+    for i in range(5):
+        writer.post(lambda i=i: ran.append((i, threading.current_thread().name)))
+    writer.post(lambda: 1 / 0)
+    writer.start()
+
+    assert writer.stop(5.0)
+    assert ran[:5] == [(i, ho.WRITER_THREAD_NAME) for i in range(5)]
+    assert isinstance(ran[5], ZeroDivisionError)
+
+
+def test_stop_without_start():
+    writer = ho.SingleWriter(on_error=lambda fn, exc: None)
+    assert writer.stop(0.1)
+
+
+def test_terminate_flushes_on_writer_thread(house, tmp_path):
+    threads = []
+
+    def spy():
+        save = house.app.energy.save
+
+        def recorded():
+            threads.append(threading.current_thread().name)
+            save()
+
+        house.app.energy.save = recorded
+
+    house.call(spy)
+    house.stop()
+
+    assert threads == [ho.WRITER_THREAD_NAME]
+    assert (tmp_path / "energy_ledger.json").exists()